@@ -0,0 +1,373 @@
+"""
+Reproducible benchmarks for the solvers in puzzle_tools
+
+Each puzzle type has a named corpus in small, medium and hard tiers. Every
+case is solved by each of its solvers after some warmup runs, recording
+wall time, nodes per second and peak memory. Results are written as JSON
+and can be compared against a stored baseline, for example:
+
+    python benchmark.py --tier small --tier medium --output now.json
+    python benchmark.py --baseline benchmark_baseline.json
+
+which exits with status 1 if any case got slower, generated more nodes or
+used more memory than the baseline allows.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+import puzzle_tools
+from search_stats import SearchStats
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from mn_puzzle import MNPuzzle
+from sudoku_puzzle import SudokuPuzzle
+from word_ladder_puzzle import WordLadderPuzzle
+
+TIERS = ("small", "medium", "hard")
+WORDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words")
+_word_set = None
+
+
+def _words():
+    """
+    Return the set of words in the words file, read once.
+
+    @rtype: set[str]
+    """
+    global _word_set
+    if _word_set is None:
+        with open(WORDS, "r") as words:
+            _word_set = set(words.read().split())
+    return _word_set
+
+
+def _sudoku(*rows, branching="mrv", propagation=False):
+    """
+    Return a function building the SudokuPuzzle whose rows are the strings
+    rows, with "*" for empty positions, with the branching and propagation
+    options given.
+
+    @type rows: str
+    @type branching: str
+    @type propagation: bool
+    @rtype: () -> SudokuPuzzle
+    """
+    n = len(rows)
+    symbols = "123456789" if n == 9 else "ABCD"
+    return lambda: SudokuPuzzle(n, [ch for row in rows for ch in row],
+                                set(symbols[:n]), branching, propagation)
+
+
+# the sudokus of the medium and hard tiers, by name
+_SUDOKUS = {
+    "star-2015-07-09": ("***7*8*1*", "**7*9***6", "9*31*****",
+                        "35*8**6*1", "*********", "1*6**9*48",
+                        "*****12*7", "8***7*4**", "*6*3*2***"),
+    "3-star-2015-11-14": ("***9*2***", "*91***63*", "*3**7**8*",
+                          "3*******8", "**9***2**", "5*******7",
+                          "*7**8**4*", "*45***81*", "***3*6***"),
+    "4-star-2015-11-14": ("56***7**9", "*7**48*31", "*********",
+                          "43*******", "*8*****9*", "*******26",
+                          "*********", "19*36**7*", "7**1***42")}
+
+
+def _sudoku_cases(*names):
+    """
+    Return corpus cases for the sudokus named names, each with the default
+    options, filling the first empty position, and with propagation.
+
+    @type names: str
+    @rtype: list[(str, () -> SudokuPuzzle, tuple[str])]
+    """
+    return [case for name in names
+            for case in ((name, _sudoku(*_SUDOKUS[name]),
+                          ("depth_first_solve",)),
+                         (name + "-first",
+                          _sudoku(*_SUDOKUS[name], branching="first"),
+                          ("depth_first_solve",)),
+                         (name + "-propagated",
+                          _sudoku(*_SUDOKUS[name], propagation=True),
+                          ("depth_first_solve",)))]
+
+
+def _peg(*rows):
+    """
+    Return a function building the GridPegSolitairePuzzle whose rows are
+    the strings rows.
+
+    @type rows: str
+    @rtype: () -> GridPegSolitairePuzzle
+    """
+    return lambda: GridPegSolitairePuzzle([list(row) for row in rows],
+                                          {"*", ".", "#"})
+
+
+def _mn(start, target):
+    """
+    Return a function building the MNPuzzle from start to target, given as
+    strings of rows separated by "/".
+
+    @type start: str
+    @type target: str
+    @rtype: () -> MNPuzzle
+    """
+    def grid(s):
+        return tuple([tuple(row) for row in s.split("/")])
+    return lambda: MNPuzzle(grid(start), grid(target))
+
+
+def _ladder(from_word, to_word):
+    """
+    Return a function building the WordLadderPuzzle from from_word to
+    to_word over the words file.
+
+    @type from_word: str
+    @type to_word: str
+    @rtype: () -> WordLadderPuzzle
+    """
+    return lambda: WordLadderPuzzle(from_word, to_word, _words())
+
+
+# puzzle type -> tier -> list of (name, builder, solver names)
+CORPUS = {
+    "sudoku": {
+        "small": [("4x4", _sudoku("A***", "**B*", "*C**", "***D"),
+                   ("depth_first_solve",))],
+        "medium": _sudoku_cases("star-2015-07-09"),
+        "hard": _sudoku_cases("3-star-2015-11-14", "4-star-2015-11-14")},
+    "peg": {
+        "small": [("4x4", _peg("****", ".***", "****", "****"),
+                   ("depth_first_solve",))],
+        "medium": [("5x5", _peg("*****", "*****", "*****", "**.**",
+                                "*****"),
+                    ("depth_first_solve",)),
+                   ("english-cross",
+                    _peg("##***##", "##***##", "*******", "***.***",
+                         "*******", "##***##", "##***##"),
+                    ("depth_first_solve",))],
+        "hard": [("6x6", _peg("******", ".*****", "******", "******",
+                              "******", "******"),
+                  ("depth_first_solve",))]},
+    "mn": {
+        "small": [("2x3", _mn("*23/145", "123/45*"),
+                   ("breadth_first_solve", "astar_solve"))],
+        "medium": [("3x3-20", _mn("136/7*2/485", "123/456/78*"),
+                    ("breadth_first_solve", "bidirectional_solve",
+                     "astar_solve"))],
+        "hard": [("3x3-31", _mn("867/254/3*1", "123/456/78*"),
+                  ("bidirectional_solve", "astar_solve",
+                   "ida_star_solve"))]},
+    "word_ladder": {
+        "small": [("cat-dog", _ladder("cat", "dog"),
+                   ("breadth_first_solve", "bidirectional_solve"))],
+        "medium": [("same-cost", _ladder("same", "cost"),
+                    ("breadth_first_solve", "bidirectional_solve",
+                     "astar_solve"))],
+        "hard": [("stone-money", _ladder("stone", "money"),
+                  ("breadth_first_solve", "bidirectional_solve",
+                   "astar_solve"))]}}
+
+
+def cases(puzzle_types=None, tiers=None):
+    """
+    Return the (case name, builder, solver names) triples of CORPUS for
+    puzzle_types and tiers, or for all of them if None.
+
+    @type puzzle_types: list[str] | None
+    @type tiers: list[str] | None
+    @rtype: list[(str, () -> Puzzle, tuple[str])]
+
+    >>> [c[0] for c in cases(["peg"], ["medium"])]
+    ['peg/medium/5x5', 'peg/medium/english-cross']
+    """
+    result = []
+    for puzzle_type in puzzle_types or sorted(CORPUS):
+        for tier in tiers or TIERS:
+            for (name, builder, solvers) in CORPUS[puzzle_type][tier]:
+                result.append(("{}/{}/{}".format(puzzle_type, tier, name),
+                               builder, solvers))
+    return result
+
+
+def run_case(name, puzzle, solver_name, repeat=5, warmup=1):
+    """
+    Return a dict of measurements of solving puzzle with the puzzle_tools
+    function solver_name, timed over repeat runs after warmup untimed runs,
+    plus one run under tracemalloc for peak memory. Raise ValueError if
+    repeat is less than 1.
+
+    @type name: str
+    @type puzzle: Puzzle
+    @type solver_name: str
+    @type repeat: int
+    @type warmup: int
+    @rtype: dict
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1, not {}".format(repeat))
+    solver = getattr(puzzle_tools, solver_name)
+    for _ in range(warmup):
+        solver(puzzle)
+    times = []
+    for _ in range(repeat):
+        stats = SearchStats()
+        gc.collect()
+        start = perf_counter()
+        solution = solver(puzzle, stats)
+        times.append(perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    solver(puzzle)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times.sort()
+    median = times[len(times) // 2]
+    length = None
+    if solution is not None:
+        length = 0
+        while solution.children:
+            solution, length = solution.children[0], length + 1
+    return {"case": name, "solver": solver_name, "runs": repeat,
+            "min_seconds": times[0], "median_seconds": median,
+            "mean_seconds": sum(times) / len(times),
+            "nodes_generated": stats.nodes_generated,
+            "nodes_expanded": stats.nodes_expanded,
+            "nodes_per_second": (stats.nodes_generated / median
+                                 if median else 0.0),
+            "peak_memory_bytes": peak,
+            "solution_length": length}
+
+
+def run(puzzle_types=None, tiers=None, solvers=None, repeat=5, warmup=1,
+        log=None):
+    """
+    Return a report with the measurements of every corpus case of
+    puzzle_types and tiers, for each of its solvers or only those in
+    solvers. Each finished measurement is passed to log, if given.
+
+    @type puzzle_types: list[str] | None
+    @type tiers: list[str] | None
+    @type solvers: list[str] | None
+    @type repeat: int
+    @type warmup: int
+    @type log: (dict) -> Any | None
+    @rtype: dict
+
+    >>> report = run(["sudoku"], ["small"], repeat=1, warmup=0)
+    >>> result = report["results"][0]
+    >>> result["case"], result["solver"], result["solution_length"]
+    ('sudoku/small/4x4', 'depth_first_solve', 12)
+    """
+    results = []
+    for (name, builder, case_solvers) in cases(puzzle_types, tiers):
+        puzzle = builder()
+        for solver_name in case_solvers:
+            if solvers is None or solver_name in solvers:
+                result = run_case(name, puzzle, solver_name, repeat, warmup)
+                results.append(result)
+                if log is not None:
+                    log(result)
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat, "warmup": warmup, "results": results}
+
+
+def compare(report, baseline, tolerance=0.25, slack_seconds=0.005):
+    """
+    Return a description of every regression of report against baseline:
+    a case and solver whose fastest time grew by more than the fraction
+    tolerance plus slack_seconds, whose peak memory grew by more than the
+    fraction tolerance, or which generated more nodes. slack_seconds keeps
+    timing noise on cases that take well under a millisecond from counting
+    as a regression. Cases missing from either report are skipped.
+
+    @type report: dict
+    @type baseline: dict
+    @type tolerance: float
+    @type slack_seconds: float
+    @rtype: list[str]
+
+    >>> old = {"results": [{"case": "c", "solver": "s", "nodes_generated": 10,
+    ...                     "min_seconds": 1.0, "peak_memory_bytes": 100}]}
+    >>> new = {"results": [{"case": "c", "solver": "s", "nodes_generated": 10,
+    ...                     "min_seconds": 1.5, "peak_memory_bytes": 100}]}
+    >>> compare(new, old)
+    ['c with s: min_seconds 1 -> 1.5']
+    >>> compare(old, new)
+    []
+    >>> old["results"][0]["min_seconds"] = 0.0001
+    >>> new["results"][0]["min_seconds"] = 0.0003
+    >>> compare(new, old)
+    []
+    """
+    before = dict([((r["case"], r["solver"]), r)
+                   for r in baseline["results"]])
+    regressions = []
+    for result in report["results"]:
+        old = before.get((result["case"], result["solver"]))
+        if old is None:
+            continue
+        for (measure, slack, floor) in (
+                ("min_seconds", tolerance, slack_seconds),
+                ("peak_memory_bytes", tolerance, 0),
+                ("nodes_generated", 0, 0)):
+            if result[measure] > old[measure] * (1 + slack) + floor:
+                regressions.append("{} with {}: {} {:.4g} -> {:.4g}".format(
+                    result["case"], result["solver"], measure,
+                    old[measure], result[measure]))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the benchmarks selected by the command-line arguments argv, print
+    the results and return the exit status.
+
+    @type argv: list[str] | None
+    @rtype: int
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--puzzle", action="append", choices=sorted(CORPUS),
+                        help="puzzle type to run (default: all)")
+    parser.add_argument("--tier", action="append", choices=TIERS,
+                        help="tier to run (default: all)")
+    parser.add_argument("--solver", action="append",
+                        help="solver to run (default: each case's solvers)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional growth in time and memory")
+    parser.add_argument("--slack", type=float, default=0.005,
+                        help="allowed growth in seconds on top of tolerance")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    def log(result):
+        print("{case:<42} {solver:<22} {median_seconds:9.4f}s "
+              "{nodes_generated:9d} nodes {nodes_per_second:10.0f} nodes/s "
+              "{peak_memory_bytes:12d} B".format(**result))
+
+    report = run(args.puzzle, args.tier, args.solver, args.repeat,
+                 args.warmup, log)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, "r") as stored:
+            regressions = compare(report, json.load(stored), args.tolerance,
+                                  args.slack)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Exact cover by Algorithm X on dancing links, with a sudoku translation
+
+An exact cover problem asks for a set of rows of a 0-1 matrix holding
+exactly one 1 in every column. A sudoku is one: each (position, symbol)
+choice is a row covering four columns, one for the position and one for
+the symbol in each of its row, column and subsquare. Algorithm X searches
+the rows choosing, each time, the column with the fewest rows left, and
+dancing links make covering and uncovering a column cost only the rows
+that touch it. This keeps sudokus with n = 16 or n = 25 within reach.
+"""
+from puzzle_tools import _path_from_list
+from search_stats import SearchStats
+from sudoku_puzzle import _units
+from time import perf_counter
+
+
+class ExactCover:
+    """
+    An exact cover problem over columns 0 .. columns - 1, held as a
+    dancing-links matrix.
+    """
+
+    def __init__(self, columns, rows):
+        """
+        Create a new ExactCover self whose row r has a 1 in each column of
+        rows[r].
+
+        @type self: ExactCover
+        @type columns: int
+        @type rows: list[list[int]]
+        @rtype: None
+        """
+        # node 0 is the root, nodes 1 .. columns the column headers, and
+        # every 1 of the matrix a further node; each node has links left,
+        # right, up and down, its column header and its row
+        self.columns = columns
+        self.nodes = 0
+        size = 1 + columns + sum([len(row) for row in rows])
+        left, right = list(range(-1, size - 1)), list(range(1, size + 1))
+        up, down = list(range(size)), list(range(size))
+        column, row_of = [0] * size, [-1] * size
+        left[0], right[columns] = columns, 0
+        self._count = [0] * (columns + 1)
+        x = columns + 1
+        for r in range(len(rows)):
+            first = x
+            for c in rows[r]:
+                header = c + 1
+                column[x], row_of[x] = header, r
+                up[x], down[x] = up[header], header
+                down[up[header]] = x
+                up[header] = x
+                self._count[header] += 1
+                left[x], right[x] = x - 1, x + 1
+                x += 1
+            if x > first:
+                left[first], right[x - 1] = x - 1, first
+        self._links = left, right, up, down
+        self._column, self._row = column, row_of
+
+    def _cover(self, c):
+        """
+        Remove column header c of ExactCover self and every row with a 1
+        in column c from the matrix.
+
+        @type self: ExactCover
+        @type c: int
+        @rtype: None
+        """
+        left, right, up, down = self._links
+        column, count = self._column, self._count
+        right[left[c]], left[right[c]] = right[c], left[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]], up[down[j]] = down[j], up[j]
+                count[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, c):
+        """
+        Put back column header c of ExactCover self and its rows, undoing
+        _cover(c).
+
+        @type self: ExactCover
+        @type c: int
+        @rtype: None
+        """
+        left, right, up, down = self._links
+        column, count = self._column, self._count
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                count[column[j]] += 1
+                down[up[j]] = up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[c]] = left[right[c]] = c
+
+    def _choose(self):
+        """
+        Return the header of a column of ExactCover self with the fewest
+        rows left, the first of them if several tie.
+
+        @type self: ExactCover
+        @rtype: int
+        """
+        right, count = self._links[1], self._count
+        best, c = right[0], right[right[0]]
+        while c != 0 and count[best]:
+            if count[c] < count[best]:
+                best = c
+            c = right[c]
+        return best
+
+    def solutions(self, limit=None):
+        """
+        Yield each exact cover of ExactCover self as the list of its row
+        numbers, in the order they were chosen, stopping after limit of
+        them if limit is given. The number of rows tried is added to
+        self.nodes.
+
+        @type self: ExactCover
+        @type limit: int | None
+        @rtype: iterator[list[int]]
+
+        >>> e = ExactCover(4, [[0, 1], [2, 3], [0], [1, 2], [3], [1]])
+        >>> sorted([sorted(s) for s in e.solutions()])
+        [[0, 1], [1, 2, 5], [2, 3, 4]]
+        >>> len(list(e.solutions(limit=2)))
+        2
+        """
+        right, down = self._links[1], self._links[3]
+        left, column, row_of = self._links[0], self._column, self._row
+        found = 0
+        if right[0] == 0:
+            yield []
+            return
+        # one (column header, chosen node) pair per level of the search;
+        # the chosen node is the header itself before any row is tried
+        headers, chosen = [], []
+        try:
+            c = self._choose()
+            self._cover(c)
+            headers.append(c)
+            chosen.append(c)
+            while headers:
+                c, r = headers[-1], chosen[-1]
+                if r != c:
+                    # take back the row tried last at this level
+                    j = left[r]
+                    while j != r:
+                        self._uncover(column[j])
+                        j = left[j]
+                r = down[r]
+                if r == c:
+                    self._uncover(c)
+                    headers.pop()
+                    chosen.pop()
+                    continue
+                chosen[-1] = r
+                self.nodes += 1
+                j = right[r]
+                while j != r:
+                    self._cover(column[j])
+                    j = right[j]
+                if right[0] == 0:
+                    found += 1
+                    yield [row_of[x] for x in chosen]
+                    if limit is not None and found >= limit:
+                        return
+                    continue
+                c = self._choose()
+                if self._count[c]:
+                    self._cover(c)
+                    headers.append(c)
+                    chosen.append(c)
+        finally:
+            # leave the matrix whole even if the search stopped early
+            while headers:
+                c, r = headers.pop(), chosen.pop()
+                if r != c:
+                    j = left[r]
+                    while j != r:
+                        self._uncover(column[j])
+                        j = left[j]
+                self._uncover(c)
+
+    def count(self, limit=None):
+        """
+        Return the number of exact covers of ExactCover self, counting no
+        further than limit if it is given.
+
+        @type self: ExactCover
+        @type limit: int | None
+        @rtype: int
+
+        >>> ExactCover(2, [[0], [1], [0, 1]]).count()
+        2
+        >>> ExactCover(2, [[0], [0, 1]]).count(limit=5)
+        1
+        """
+        return len([s for s in self.solutions(limit)])
+
+
+def sudoku_cover(puzzle):
+    """
+    Return an (ExactCover, choices) pair for SudokuPuzzle puzzle: row r of
+    the ExactCover stands for putting symbol choices[r][1] at position
+    choices[r][0], and its exact covers are the solutions of puzzle.
+
+    Filled positions get only the row for their symbol, and empty ones
+    only rows for the symbols still legal there.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: (ExactCover, list[(int, str)])
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> s = SudokuPuzzle(4, ["A", "B", "C", "*"] + ["*"] * 12,
+    ...                  {"A", "B", "C", "D"})
+    >>> cover, choices = sudoku_cover(s)
+    >>> cover.columns, choices[:4]
+    (64, [(0, 'A'), (1, 'B'), (2, 'C'), (3, 'D')])
+    """
+    n, symbols, order = puzzle._n, puzzle._symbols, puzzle._order
+    units = _units(n)
+    rows, choices = [], []
+    for i in range(n ** 2):
+        if symbols[i] == "*":
+            allowed = puzzle._candidates(i)
+            ks = [k for k in range(n) if allowed >> k & 1]
+        else:
+            ks = [order.index(symbols[i])]
+        r, c, b = units[i]
+        for k in ks:
+            # columns: position, then symbol k in row r, column c, box b
+            rows.append([i, n ** 2 + r * n + k, 2 * n ** 2 + c * n + k,
+                         3 * n ** 2 + b * n + k])
+            choices.append((i, order[k]))
+    return ExactCover(4 * n ** 2, rows), choices
+
+
+def exact_cover_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution of SudokuPuzzle puzzle, each child filling one more empty
+    position in the order Algorithm X chose them. Return None if puzzle
+    has no solution.
+
+    If stats is a SearchStats, the rows tried are counted as nodes
+    generated and the time taken is added.
+
+    @type puzzle: SudokuPuzzle
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | None
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> s = SudokuPuzzle(4, ["A"] + ["*"] * 15,
+    ...                  {"A", "B", "C", "D"})
+    >>> node, steps = exact_cover_solve(s), 0
+    >>> while node.children:
+    ...     node, steps = node.children[0], steps + 1
+    >>> node.puzzle.is_solved(), steps
+    (True, 15)
+    """
+    if stats is None:
+        stats = SearchStats()
+    start = perf_counter()
+    try:
+        if puzzle.fail_fast():
+            return None
+        cover, choices = sudoku_cover(puzzle)
+        rows = next(cover.solutions(1), None)
+        stats.nodes_generated += cover.nodes
+        if rows is None:
+            return None
+        path = [puzzle]
+        for r in rows:
+            i, d = choices[r]
+            if path[-1]._symbols[i] == "*":
+                path.append(path[-1]._child(i, d))
+        return _path_from_list(path)
+    finally:
+        stats.seconds += perf_counter() - start
+
+
+def solved_sudoku(puzzle):
+    """
+    Return the solved SudokuPuzzle reached from SudokuPuzzle puzzle, or
+    None if puzzle has no solution.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: SudokuPuzzle | None
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> s = SudokuPuzzle(4, ["A", "B", "C", "*"] + ["*"] * 12,
+    ...                  {"A", "B", "C", "D"})
+    >>> print(solved_sudoku(s))
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    """
+    node = exact_cover_solve(puzzle)
+    if node is None:
+        return None
+    while node.children:
+        node = node.children[0]
+    return node.puzzle
+
+
+def count_solutions(puzzle, limit=None):
+    """
+    Return the number of solutions of SudokuPuzzle puzzle, counting no
+    further than limit if it is given. A puzzle has a unique solution
+    exactly when count_solutions(puzzle, 2) == 1.
+
+    @type puzzle: SudokuPuzzle
+    @type limit: int | None
+    @rtype: int
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> s = SudokuPuzzle(4, ["A", "B", "C", "*"] + ["*"] * 12,
+    ...                  {"A", "B", "C", "D"})
+    >>> count_solutions(s)
+    12
+    >>> count_solutions(s, 2)
+    2
+    """
+    if puzzle.fail_fast():
+        return 0
+    return sudoku_cover(puzzle)[0].count(limit)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,5 +1,101 @@
 from puzzle import Puzzle
-import copy
+
+# for each (rows, columns, bitmask of usable positions), the jumps possible
+# on that board
+_jump_tables = {}
+
+
+def _jumps(rows, columns, usable):
+    """
+    Return the (from and over, to, from and over and to) bitmasks of every
+    jump on a rows x columns board whose non-"#" positions are the bits of
+    usable, position (r, c) being bit r * columns + c. Jumps are ordered
+    by starting position in reading order, then right, left, up, down.
+    The table is built the first time it is asked for.
+
+    @type rows: int
+    @type columns: int
+    @type usable: int
+    @rtype: tuple[(int, int, int)]
+
+    >>> _jumps(1, 3, 0b111)
+    ((3, 4, 7), (6, 1, 7))
+    """
+    key = (rows, columns, usable)
+    if key not in _jump_tables:
+        table = []
+        for r in range(rows):
+            for c in range(columns):
+                for (dr, dc) in ((0, 1), (0, -1), (-1, 0), (1, 0)):
+                    if (0 <= r + 2 * dr < rows and
+                            0 <= c + 2 * dc < columns):
+                        f = 1 << (r * columns + c)
+                        o = 1 << ((r + dr) * columns + c + dc)
+                        t = 1 << ((r + 2 * dr) * columns + c + 2 * dc)
+                        if usable & (f | o | t) == f | o | t:
+                            table.append((f | o, t, f | o | t))
+        _jump_tables[key] = tuple(table)
+    return _jump_tables[key]
+
+
+# for each (rows, columns, bitmask of usable positions), the symmetries
+# of that board
+_symmetry_tables = {}
+# widest board whose symmetries are used, which keeps each row table small
+_MAX_SYMMETRY_COLUMNS = 12
+
+
+def _symmetries(rows, columns, usable):
+    """
+    Return a (count, tables) pair for the rotations and reflections other
+    than the identity that map a rows x columns board whose non-"#"
+    positions are the bits of usable onto itself. count is how many there
+    are, and tables[r] maps each pattern of pegs in row r to the images of
+    those pegs under all count symmetries, packed into one int with the
+    image under the k-th symmetry shifted by k * rows * columns bits. A
+    whole board's images are then one lookup per row. The tables are
+    built the first time they are asked for.
+
+    @type rows: int
+    @type columns: int
+    @type usable: int
+    @rtype: (int, tuple[tuple[int]])
+
+    >>> _symmetries(3, 3, 0b111111111)[0], _symmetries(2, 3, 0b111111)[0]
+    (7, 3)
+    >>> _symmetries(2, 2, 0b0111)
+    (1, ((0, 1, 4, 5), (0, 2, 8, 10)))
+    """
+    key = (rows, columns, usable)
+    if key not in _symmetry_tables:
+        size, last_r, last_c = rows * columns, rows - 1, columns - 1
+        maps = [lambda r, c: (last_r - r, c), lambda r, c: (r, last_c - c),
+                lambda r, c: (last_r - r, last_c - c)]
+        if rows == columns:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (last_c - c, last_r - r),
+                     lambda r, c: (c, last_r - r),
+                     lambda r, c: (last_c - c, r)]
+        # for each symmetry kept, the bit each position goes to
+        kept = []
+        for image in maps:
+            moved = [image(i // columns, i % columns) for i in range(size)]
+            moved = [1 << (r * columns + c) for (r, c) in moved]
+            if (columns <= _MAX_SYMMETRY_COLUMNS and
+                    sum([moved[i] for i in range(size)
+                         if usable >> i & 1]) == usable):
+                kept.append(moved)
+        tables = []
+        for r in range(rows * bool(kept)):
+            row = [0] * (1 << columns)
+            for v in range(1, 1 << columns):
+                low = r * columns + (v & -v).bit_length() - 1
+                row[v] = row[v & (v - 1)] | sum(
+                    [kept[k][low] << (k * size) for k in range(len(kept))])
+            tables.append(tuple(row))
+        _symmetry_tables[key] = (len(kept), tuple(tables))
+    return _symmetry_tables[key]
+
 
 class GridPegSolitairePuzzle(Puzzle):
     """
@@ -22,15 +118,107 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([len(x) == len(marker[0]) for x in marker[1:]])
         assert all([all(x in marker_set for x in row) for row in marker])
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])
-        self._marker, self._marker_set = marker, marker_set
+        self._grid, self._marker_set = marker, marker_set
+        # the board as bitboards: position (r, c) is bit r * columns + c
+        self._rows, self._columns = len(marker), len(marker[0])
+        cells = [x for row in marker for x in row]
+        self._pegs = sum([1 << i for i in range(len(cells))
+                          if cells[i] == "*"])
+        self._usable = sum([1 << i for i in range(len(cells))
+                            if cells[i] != "#"])
+        self._jumps = _jumps(self._rows, self._columns, self._usable)
+        self._symmetries = _symmetries(self._rows, self._columns,
+                                       self._usable)
+
+    @property
+    def _marker(self):
+        """
+        Return the grid of GridPegSolitairePuzzle self as lists of markers,
+        built from the bitboards the first time it is asked for.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: list[list[str]]
+        """
+        if self._grid is None:
+            pegs, usable, columns = self._pegs, self._usable, self._columns
+            self._grid = [["*" if pegs >> (r * columns + c) & 1 else
+                           "." if usable >> (r * columns + c) & 1 else "#"
+                           for c in range(columns)]
+                          for r in range(self._rows)]
+        return self._grid
+
+    def _child(self, pegs):
+        """
+        Return the GridPegSolitairePuzzle on the board of self with pegs at
+        the bits of pegs, sharing everything that does not change.
+
+        @type self: GridPegSolitairePuzzle
+        @type pegs: int
+        @rtype: GridPegSolitairePuzzle
+        """
+        child = object.__new__(type(self))
+        child._grid, child._marker_set = None, self._marker_set
+        child._rows, child._columns = self._rows, self._columns
+        child._pegs, child._usable = pegs, self._usable
+        child._jumps, child._symmetries = self._jumps, self._symmetries
+        return child
 
     # implement __eq__, __str__ methods
     def __eq__(self, other):
 
         return(type(other) == type(self) and
-               self._marker == other._marker and
+               self._rows == other._rows and
+               self._columns == other._columns and
+               self._pegs == other._pegs and
+               self._usable == other._usable and
                self._marker_set == other._marker_set)
 
+    def __hash__(self):
+        """
+        Return a hash of GridPegSolitairePuzzle self consistent with __eq__.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return a hashable key for the current configuration of
+        GridPegSolitairePuzzle self: the bitboard of its pegs, since
+        extensions never change the board's shape or "#" positions.
+
+        Whether a board can be solved does not change under a rotation or
+        reflection that maps its "#" positions onto themselves, so the key
+        is the least bitboard of the pegs under any such symmetry, and
+        searches explore only one of each set of symmetric boards.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> g = GridPegSolitairePuzzle([["*", "*"], [".", "#"]], {"*", ".", "#"})
+        >>> g.state_key()
+        3
+        >>> h = GridPegSolitairePuzzle([["*", "."], ["*", "#"]], {"*", ".", "#"})
+        >>> h.state_key()
+        3
+        """
+        count, tables = self._symmetries
+        pegs, columns = self._pegs, self._columns
+        size = self._rows * columns
+        row_bits, board_bits = (1 << columns) - 1, (1 << size) - 1
+        images = 0
+        for row in tables:
+            images |= row[pegs & row_bits]
+            pegs >>= columns
+        key = self._pegs
+        for _ in range(count):
+            image = images & board_bits
+            if image < key:
+                key = image
+            images >>= size
+        return key
+
     def __str__(self):
         # game = ''
         #
@@ -52,108 +240,24 @@ class GridPegSolitairePuzzle(Puzzle):
     def extensions(self):
     # legal extensions consist of all configurations that can be reached by
     # making a single jump from this configuration
+        return list(self.iter_extensions())
 
-        #helper function to find Pegs
-        def find_peg(marker):
-            peg_locations = []
-            for r in range(len(marker)):
-                for c in range(len(marker[r])):
-                    if marker[r][c] == '*':
-                        peg_locations.append((r,c))
-
-            return peg_locations
-
-        def get_position(r,c):
-            #check if R and C are in the proper bounds
-            if r >= 0 and r < len(self._marker) and c >= 0 and c < len(self._marker[0]):
-                return self._marker[r][c]
-            else:
-                return None
-
-        def check_right(r,c):
-            return get_position(r,c+1) == "*" and get_position(r,c+2) == '.'
-
-        def move_right(r,c):
-            new_config = copy.deepcopy(self._marker)
-            new_config[r][c] = '.'
-            new_config[r][c+1] = '.'
-            new_config[r][c+2] = '*'
-            return GridPegSolitairePuzzle(new_config, self._marker_set)
-
-        def check_left(r,c):
-            return get_position(r,c-1) == "*" and get_position(r,c-2) =='.'
-
-        def move_left(r,c):
-            new_config = copy.deepcopy(self._marker)
-            new_config[r][c] ='.'
-            new_config[r][c-1] = '.'
-            new_config[r][c-2] = '*'
-            return GridPegSolitairePuzzle(new_config,self._marker_set)
-
-        def check_up(r,c):
-            return get_position(r-1, c) == '*' and get_position(r-2,c) == '.'
-
-        def move_up(r,c):
-            new_config = copy.deepcopy(self._marker)
-            new_config[r][c] ='.'
-            new_config[r-1][c] = '.'
-            new_config[r-2][c] = '*'
-            return GridPegSolitairePuzzle(new_config,self._marker_set)
-
-        def check_down(r,c):
-            return get_position(r+1, c) == '*' and get_position(r+2,c) == '.'
-
-        def move_down(r,c):
-            new_config = copy.deepcopy(self._marker)
-            new_config[r][c] ='.'
-            new_config[r+1][c] = '.'
-            new_config[r+2][c] = '*'
-            return GridPegSolitairePuzzle(new_config,self._marker_set)
-
-        possible_extensions = []
-
-        for peg in find_peg(self._marker):
-            if check_right(peg[0],peg[1]):
-                possible_extensions.append(move_right(peg[0],peg[1]))
-
-            if check_left(peg[0],peg[1]):
-                possible_extensions.append(move_left(peg[0],peg[1]))
-
-            if check_up(peg[0],peg[1]):
-                possible_extensions.append(move_up(peg[0],peg[1]))
-
-            if check_down(peg[0],peg[1]):
-                possible_extensions.append(move_down(peg[0],peg[1]))
-
-        return possible_extensions
+    def iter_extensions(self):
+    # same extensions as extensions(), but each configuration is only
+    # built once the solver asks for it: a jump needs pegs at its from and
+    # over positions and a hole at its to position, and flips all three
+        pegs = self._pegs
+        for (source, target, move) in self._jumps:
+            if pegs & source == source and not pegs & target:
+                yield self._child(pegs ^ move)
 
     def is_solved(self):
-        star_count = 0
-        #going through the rows to count *
-        for row in self._marker:
-            star_count += row.count('*')
-            #total stars should not exceed 1
-            if star_count >= 1:
-                return False
-
-        return True
+        # exactly one peg left
+        pegs = self._pegs
+        return pegs != 0 and pegs & (pegs - 1) == 0
 
 if __name__ == "__main__":
     import doctest
-
     doctest.testmod()
-    from puzzle_tools import depth_first_solve
-
-    grid = [["*", "*", "*", "*", "*"],
-            ["*", "*", "*", "*", "*"],
-            ["*", "*", "*", "*", "*"],
-            ["*", "*", ".", "*", "*"],
-            ["*", "*", "*", "*", "*"]]
-    gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
-    import time
-
-    start = time.time()
-    solution = depth_first_solve(gpsp)
-    end = time.time()
-    print("Solved 5x5 peg solitaire in {} seconds.".format(end - start))
-    print("Using depth-first: \n{}".format(solution))
+    from benchmark import main
+    main(["--puzzle", "peg", "--repeat", "1", "--warmup", "0"])
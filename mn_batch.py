@@ -0,0 +1,218 @@
+"""
+Solving many MNPuzzles that share goals
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from mn_puzzle import MNPuzzle, _neighbours, _goal_positions, _packing
+from pattern_database import PatternDatabase
+from puzzle_tools import ida_star_solve, _path_from_list
+
+# pattern databases already opened in this process, by (to_grid, cache_dir)
+_databases = {}
+
+
+def solve_many(puzzles, solver=ida_star_solve, ordered=True,
+               pattern_databases=False, workers=None, cache_dir=None):
+    """
+    Yield an (index, solution) pair for each MNPuzzle in puzzles, where
+    solution is what solver returns for puzzles[index].
+
+    Puzzles are grouped by to_grid, and the goal tables, neighbour tables
+    and, if pattern_databases is True, the pattern database of each group
+    are built once and shared by every puzzle in it. A puzzle with a
+    pattern database of its own is solved with that one instead. Results
+    are yielded in input order if ordered is True, or as they finish
+    otherwise.
+
+    Each solution starts from the puzzle given, followed by MNPuzzles with
+    the pattern database used to solve it. Without workers, the rest of
+    the path is what solver returns. With workers, the puzzles are solved
+    in that many processes, each of which opens a group's pattern database
+    once, and each path is rebuilt from the configurations along it;
+    solver must then be a module-level function.
+
+    @type puzzles: list[MNPuzzle]
+    @type solver: (Puzzle) -> PuzzleNode | None
+    @type ordered: bool
+    @type pattern_databases: bool
+    @type workers: int | None
+    @type cache_dir: str | None
+    @rtype: iterator[(int, PuzzleNode | None)]
+
+    >>> goal = (("1", "2", "3"), ("4", "5", "*"))
+    >>> starts = [(("*", "2", "3"), ("1", "4", "5")),
+    ...           (("1", "2", "3"), ("4", "*", "5")),
+    ...           (("2", "1", "3"), ("4", "5", "*"))]
+    >>> for (i, solution) in solve_many([MNPuzzle(s, goal) for s in starts]):
+    ...     steps = None
+    ...     if solution is not None:
+    ...         steps = 0
+    ...         while solution.children:
+    ...             solution, steps = solution.children[0], steps + 1
+    ...     print(i, steps)
+    0 3
+    1 1
+    2 None
+    >>> puzzle = MNPuzzle(starts[1], goal)
+    >>> next(solve_many([puzzle]))[1].puzzle is puzzle
+    True
+    >>> import tempfile
+    >>> cache = tempfile.mkdtemp()
+    >>> solution = next(solve_many([puzzle], pattern_databases=True,
+    ...                            cache_dir=cache))[1]
+    >>> solution.puzzle is puzzle
+    True
+    >>> solution.children[0].puzzle._pattern_database.cache_dir == cache
+    True
+    """
+    groups = {}
+    for puzzle in puzzles:
+        groups.setdefault(puzzle.to_grid, []).append(puzzle)
+    for to_grid in groups:
+        _prepare(to_grid, pattern_databases, cache_dir)
+    if workers is None:
+        results = _solve_serially(puzzles, solver, pattern_databases,
+                                  cache_dir)
+    else:
+        results = _solve_in_pool(puzzles, solver, pattern_databases,
+                                 cache_dir, workers)
+    if not ordered:
+        for result in results:
+            yield result
+    else:
+        waiting, next_index = {}, 0
+        for (index, solution) in results:
+            waiting[index] = solution
+            while next_index in waiting:
+                yield next_index, waiting.pop(next_index)
+                next_index += 1
+
+
+def _prepare(to_grid, pattern_databases, cache_dir):
+    """
+    Build the tables shared by every MNPuzzle working towards to_grid, and
+    return its pattern database, or None if there is none.
+
+    @type to_grid: tuple[tuple[str]]
+    @type pattern_databases: bool
+    @type cache_dir: str | None
+    @rtype: PatternDatabase | None
+    """
+    target = tuple([x for row in to_grid for x in row])
+    _neighbours(len(to_grid), len(to_grid[0]))
+    goal = _goal_positions(target, len(to_grid[0]))
+    _packing(target)
+    if not pattern_databases or goal is None or "*" not in target:
+        return None
+    key = (to_grid, cache_dir)
+    if key not in _databases:
+        _databases[key] = PatternDatabase(to_grid, cache_dir=cache_dir)
+    return _databases[key]
+
+
+def _solve_one(from_grid, to_grid, solver, database, pattern_databases,
+               cache_dir):
+    """
+    Return the flattened configurations along the path solver finds from
+    from_grid to to_grid, or None if it finds none. The search uses
+    pattern database database if given, and otherwise the group's. This is
+    what a worker process sends back in place of a PuzzleNode.
+
+    @type from_grid: tuple[tuple[str]]
+    @type to_grid: tuple[tuple[str]]
+    @type solver: (Puzzle) -> PuzzleNode | None
+    @type database: PatternDatabase | None
+    @type pattern_databases: bool
+    @type cache_dir: str | None
+    @rtype: list[tuple[tuple[str]]] | None
+    """
+    if database is None:
+        database = _prepare(to_grid, pattern_databases, cache_dir)
+    node = solver(MNPuzzle(from_grid, to_grid, database))
+    if node is None:
+        return None
+    grids = [node.puzzle.from_grid]
+    while node.children:
+        node = node.children[0]
+        grids.append(node.puzzle.from_grid)
+    return grids
+
+
+def _rebuild(grids, puzzle, database):
+    """
+    Return the PuzzleNode path from MNPuzzle puzzle through the states
+    grids that follow it, each MNPuzzle sharing puzzle's goal and pattern
+    database database, or None if grids is None.
+
+    @type grids: list[tuple[tuple[str]]] | None
+    @type puzzle: MNPuzzle
+    @type database: PatternDatabase | None
+    @rtype: PuzzleNode | None
+    """
+    if grids is None:
+        return None
+    return _path_from_list([puzzle] + [
+        MNPuzzle(grid, puzzle.to_grid, database) for grid in grids[1:]])
+
+
+def _solve_serially(puzzles, solver, pattern_databases, cache_dir):
+    """
+    Yield (index, solution) for each of puzzles, solved in this process.
+    A puzzle without a pattern database of its own is solved as a copy
+    with its group's, if there is one, and the copy at the root of the
+    path is replaced by the puzzle.
+
+    @type puzzles: list[MNPuzzle]
+    @type solver: (Puzzle) -> PuzzleNode | None
+    @type pattern_databases: bool
+    @type cache_dir: str | None
+    @rtype: iterator[(int, PuzzleNode | None)]
+    """
+    for index in range(len(puzzles)):
+        puzzle = puzzles[index]
+        database = _prepare(puzzle.to_grid, pattern_databases, cache_dir)
+        if database is None or puzzle._pattern_database is not None:
+            yield index, solver(puzzle)
+            continue
+        node = solver(MNPuzzle(puzzle.from_grid, puzzle.to_grid, database))
+        if node is not None:
+            node.puzzle = puzzle
+        yield index, node
+
+
+def _solve_in_pool(puzzles, solver, pattern_databases, cache_dir, workers):
+    """
+    Yield (index, solution) for each of puzzles as workers processes
+    finish them, keeping a few tasks per worker in flight.
+
+    @type puzzles: list[MNPuzzle]
+    @type solver: (Puzzle) -> PuzzleNode | None
+    @type pattern_databases: bool
+    @type cache_dir: str | None
+    @type workers: int
+    @rtype: iterator[(int, PuzzleNode | None)]
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending, next_index = {}, 0
+        while pending or next_index < len(puzzles):
+            while next_index < len(puzzles) and len(pending) < 4 * workers:
+                puzzle = puzzles[next_index]
+                future = pool.submit(_solve_one, puzzle.from_grid,
+                                     puzzle.to_grid, solver,
+                                     puzzle._pattern_database,
+                                     pattern_databases, cache_dir)
+                pending[future] = next_index
+                next_index += 1
+            done = wait(pending, return_when=FIRST_COMPLETED)[0]
+            for future in done:
+                index = pending.pop(future)
+                puzzle = puzzles[index]
+                database = puzzle._pattern_database
+                if database is None:
+                    database = _prepare(puzzle.to_grid, pattern_databases,
+                                        cache_dir)
+                yield index, _rebuild(future.result(), puzzle, database)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,19 +1,207 @@
 from puzzle import Puzzle
 
+# for each (n, m), the positions "*" can move to from each position of a
+# flattened n x m grid, in the order right, left, up, down
+_neighbour_tables = {}
+
+
+def _neighbours(n, m):
+    """
+    Return the table of positions "*" can move to from each position of a
+    flattened n x m grid, building it the first time it is asked for.
+
+    @param int n: number of rows
+    @param int m: number of columns
+    @rtype: tuple[tuple[int]]
+
+    >>> _neighbours(2, 3)[1]
+    (2, 0, 4)
+    """
+    if (n, m) not in _neighbour_tables:
+        table = []
+        for i in range(n * m):
+            row, col = divmod(i, m)
+            moves = []
+            if col < m - 1:
+                moves.append(i + 1)
+            if col > 0:
+                moves.append(i - 1)
+            if row > 0:
+                moves.append(i - m)
+            if row < n - 1:
+                moves.append(i + m)
+            table.append(tuple(moves))
+        _neighbour_tables[(n, m)] = tuple(table)
+    return _neighbour_tables[(n, m)]
+
+
+# for each (flattened to_grid, m), the (row, column) of each symbol of
+# to_grid, or None if to_grid repeats a symbol
+_goal_tables = {}
+
+
+def _goal_positions(target, m):
+    """
+    Return a dict from each symbol other than "*" of the flattened grid
+    target, m columns wide, to its (row, column), or None if a symbol is
+    repeated. Tables are built once per target.
+
+    @param tuple[str] target: flattened to_grid
+    @param int m: number of columns
+    @rtype: dict[str, (int, int)] | None
+
+    >>> _goal_positions(("1", "2", "3", "4", "5", "*"), 3)["4"]
+    (1, 0)
+    """
+    if (target, m) not in _goal_tables:
+        symbols = [x for x in target if x != "*"]
+        table = None
+        if len(set(symbols)) == len(symbols):
+            table = dict([(target[i], divmod(i, m))
+                          for i in range(len(target)) if target[i] != "*"])
+        _goal_tables[(target, m)] = table
+    return _goal_tables[(target, m)]
+
+
+def _line_conflicts(goals):
+    """
+    Return the number of symbols that have to leave a line so that the
+    rest can reach the places goals, listed in line order, without
+    passing each other: the length of goals less the length of its
+    longest increasing subsequence.
+
+    @param list[int] goals: goal places along the line, in current order
+    @rtype: int
+
+    >>> _line_conflicts([2, 1, 0])
+    2
+    >>> _line_conflicts([0, 2, 1, 3])
+    1
+    """
+    # tails[k] is the smallest tail of an increasing subsequence of
+    # length k + 1
+    tails = []
+    for g in goals:
+        k = 0
+        while k < len(tails) and tails[k] < g:
+            k += 1
+        if k == len(tails):
+            tails.append(g)
+        else:
+            tails[k] = g
+    return len(goals) - len(tails)
+
+
+# for each flattened to_grid, the 4-bit code of each symbol, or None if
+# its configurations do not fit in 64 bits
+_packing_tables = {}
+
+
+def _packing(target):
+    """
+    Return a dict from each symbol of the flattened grid target to a 4-bit
+    code, with 0 for "*", or None if target has more than 16 positions or
+    more than 15 distinct symbols besides "*".
+
+    Codes follow the sorted symbols, so a puzzle and its reversed puzzle,
+    which hold the same symbols, pack alike.
+
+    @param tuple[str] target: flattened to_grid
+    @rtype: dict[str, int] | None
+
+    >>> _packing(("1", "2", "*", "3"))
+    {'1': 1, '2': 2, '3': 3, '*': 0}
+    """
+    if target not in _packing_tables:
+        symbols = sorted(set(target) - {"*"})
+        table = None
+        if len(target) <= 16 and len(symbols) <= 15:
+            table = dict(zip(symbols, range(1, 16)))
+            table["*"] = 0
+        _packing_tables[target] = table
+    return _packing_tables[target]
+
+
+def pack_cells(cells, codes):
+    """
+    Return cells, a flattened grid of at most 16 positions, packed into
+    one int of at most 64 bits: 4 bits per position, holding the code
+    from codes of the symbol there, with position 0 in the lowest bits.
+
+    Packed configurations hash quickly and can be kept in a set[int] or an
+    array("Q").
+
+    @param tuple[str] cells: flattened grid
+    @param dict[str, int] codes: 4-bit code of each symbol, 0 for "*"
+    @rtype: int
+
+    >>> from array import array
+    >>> codes = _packing(("1", "2", "3", "4", "5", "*"))
+    >>> visited = array("Q", [pack_cells(("*", "2", "3", "1", "4", "5"),
+    ...                                  codes)])
+    >>> hex(visited[0])
+    '0x541320'
+    """
+    state = 0
+    for i in range(len(cells)):
+        state |= codes[cells[i]] << (4 * i)
+    return state
+
+
+def unpack_cells(state, size, codes):
+    """
+    Return the flattened grid of size positions packed into state by
+    pack_cells with codes.
+
+    @param int state: packed configuration
+    @param int size: number of positions
+    @param dict[str, int] codes: 4-bit code of each symbol, 0 for "*"
+    @rtype: tuple[str]
+
+    >>> codes = _packing(("1", "2", "3", "4", "5", "*"))
+    >>> unpack_cells(0x541320, 6, codes)
+    ('*', '2', '3', '1', '4', '5')
+    """
+    symbols = dict([(code, symbol) for (symbol, code) in codes.items()])
+    return tuple([symbols[(state >> (4 * i)) & 15] for i in range(size)])
+
+
+def packed_move(state, blank, target):
+    """
+    Return packed configuration state after sliding the symbol at position
+    target into the blank at position blank. "*" is code 0, so this is a
+    shift, a mask and two exclusive ors.
+
+    @param int state: packed configuration
+    @param int blank: position of "*"
+    @param int target: position next to blank
+    @rtype: int
+
+    >>> hex(packed_move(0x541320, 0, 1))
+    '0x541302'
+    """
+    tile = (state >> (4 * target)) & 15
+    return state ^ (tile << (4 * target)) ^ (tile << (4 * blank))
+
+
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like the 15-puzzle, which may be solved, unsolved,
     or even unsolvable.
     """
 
-    def __init__(self, from_grid, to_grid):
+    def __init__(self, from_grid, to_grid, pattern_database=None):
         """
         MNPuzzle in state from_grid, working towards
         state to_grid
 
+        If pattern_database is given, heuristic() also consults it; it must
+        have been built for to_grid.
+
         @param MNPuzzle self: this MNPuzzle
         @param tuple[tuple[str]] from_grid: current configuration
         @param tuple[tuple[str]] to_grid: solution configuration
+        @param PatternDatabase|None pattern_database: heuristic tables
         @rtype: None
         """
         # represent grid symbols with letters or numerals
@@ -22,7 +210,135 @@ class MNPuzzle(Puzzle):
         assert all([len(r) == len(from_grid[0]) for r in from_grid])
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
-        self.from_grid, self.to_grid = from_grid, to_grid
+        self.to_grid = to_grid
+        # the configuration is kept flat, with the position of "*" cached;
+        # from_grid is rebuilt from it when asked for
+        self._cells = tuple([x for row in from_grid for x in row])
+        self._blank = self._cells.index("*") if "*" in self._cells else None
+        self._target = tuple([x for row in to_grid for x in row])
+        self._grid = from_grid
+        # boards of up to 16 positions are also packed into one int
+        codes = _packing(self._target)
+        self._packed = None
+        if codes is not None and all([x in codes for x in self._cells]):
+            self._packed = pack_cells(self._cells, codes)
+        # moves never change whether to_grid can be reached, so fail_fast
+        # works it out once and children inherit the answer
+        self._unsolvable = None
+        self._pattern_database = pattern_database
+        # goal positions, and (estimate, manhattan, row conflicts, column
+        # conflicts) once heuristic() has been asked for
+        self._goal, self._estimate = None, None
+
+    @property
+    def from_grid(self):
+        """
+        Return the current configuration of MNPuzzle self as a tuple of rows.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> finish = (("1", "2", "3"), ("4", "5", "*"))
+        >>> p1 = MNPuzzle((("*", "2", "3"), ("1", "4", "5")), finish)
+        >>> p1.move_right().from_grid
+        (('2', '*', '3'), ('1', '4', '5'))
+        """
+        if self._grid is None:
+            cells, m = self._cells, self.m
+            self._grid = tuple([cells[i:i + m]
+                                for i in range(0, len(cells), m)])
+        return self._grid
+
+    def _child(self, target):
+        """
+        Return the MNPuzzle reached by swapping "*" with the symbol at
+        position target of self's flattened grid, sharing everything that
+        does not change.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param int target: position next to "*"
+        @rtype: MNPuzzle
+        """
+        cells = list(self._cells)
+        blank = self._blank
+        cells[blank], cells[target] = cells[target], "*"
+        child = object.__new__(type(self))
+        child.n, child.m, child.to_grid = self.n, self.m, self.to_grid
+        child._cells, child._blank = tuple(cells), target
+        child._target, child._grid = self._target, None
+        child._unsolvable = self._unsolvable
+        child._pattern_database = self._pattern_database
+        child._goal, child._estimate = self._goal, None
+        child._packed = None
+        if self._packed is not None:
+            child._packed = packed_move(self._packed, blank, target)
+        if self._estimate is not None:
+            # an informed search is running: update the estimate by delta
+            child._estimate = child._moved_estimate(self._estimate,
+                                                    cells[blank], target,
+                                                    blank)
+        return child
+
+    def _moved_estimate(self, estimate, symbol, source, destination):
+        """
+        Return the (estimate, manhattan, row conflicts, column conflicts)
+        of MNPuzzle self, reached from a parent with estimate by sliding
+        symbol from position source to position destination.
+
+        Only the moved symbol's distance changes, and only the two lines
+        it moved between can gain or lose conflicts.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param tuple estimate: the parent's estimate
+        @param str symbol: the symbol that moved
+        @param int source: its position in the parent
+        @param int destination: its position in self
+        @rtype: tuple
+        """
+        total, manhattan, rows, columns = estimate
+        goal = self._goal.get(symbol)
+        if goal is None:
+            return estimate
+        (sr, sc), (dr, dc) = divmod(source, self.m), divmod(destination,
+                                                            self.m)
+        manhattan += (abs(dr - goal[0]) + abs(dc - goal[1]) -
+                      abs(sr - goal[0]) - abs(sc - goal[1]))
+        if sr == dr:
+            columns = list(columns)
+            columns[sc] = self._column_conflicts(sc)
+            columns[dc] = self._column_conflicts(dc)
+        else:
+            rows = list(rows)
+            rows[sr] = self._row_conflicts(sr)
+            rows[dr] = self._row_conflicts(dr)
+        return (manhattan + 2 * (sum(rows) + sum(columns)), manhattan,
+                rows, columns)
+
+    def _row_conflicts(self, r):
+        """
+        Return the linear conflicts in row r of MNPuzzle self.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param int r: row
+        @rtype: int
+        """
+        goal = self._goal
+        line = self._cells[r * self.m:(r + 1) * self.m]
+        return _line_conflicts([goal[x][1] for x in line
+                                if x in goal and goal[x][0] == r])
+
+    def _column_conflicts(self, c):
+        """
+        Return the linear conflicts in column c of MNPuzzle self.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param int c: column
+        @rtype: int
+        """
+        goal = self._goal
+        line = self._cells[c::self.m]
+        return _line_conflicts([goal[x][0] for x in line
+                                if x in goal and goal[x][1] == c])
 
     # implement __eq__ and __str__
     # __repr__ is up to you
@@ -45,8 +361,40 @@ class MNPuzzle(Puzzle):
         False
         """
         return (type(self) == type(other) and
-                (self.from_grid == other.from_grid) and
-                (self.to_grid == other.to_grid))
+                self.m == other.m and
+                self._cells == other._cells and
+                self._target == other._target and
+                self.to_grid == other.to_grid)
+
+    def __hash__(self):
+        """
+        Return a hash of MNPuzzle self consistent with __eq__.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return a hashable key for the current configuration of MNPuzzle self:
+        the configuration packed into one int for boards of up to 16
+        positions, or the flattened grid otherwise.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: int | tuple[str]
+
+        >>> finish = (("1", "2", "3"), ("4", "5", "*"))
+        >>> p1 = MNPuzzle((("*", "2", "3"), ("1", "4", "5")), finish)
+        >>> hex(p1.state_key())
+        '0x541320'
+        >>> p1.move_right().state_key() == MNPuzzle(
+        ...     (("2", "*", "3"), ("1", "4", "5")), finish).state_key()
+        True
+        """
+        if self._packed is not None:
+            return self._packed
+        return self._cells
 
     def __str__(self):
         """
@@ -98,29 +446,185 @@ class MNPuzzle(Puzzle):
         >>> p1.extensions() == [right, left, down]
         True
         """
-        start = self.from_grid
-        for row in start:
-            if "*" in row:
-                row_pos = start.index(row)
-                col_pos = row.index("*")
-        if row_pos == 0 and col_pos == 0:
-            return [self.move_right(), self.move_down()]
-        if row_pos == 0 and col_pos == len(start[0]) - 1:
-            return [self.move_left(), self.move_down()]
-        if row_pos == len(start) - 1 and col_pos == 0:
-            return [self.move_right(), self.move_up()]
-        if row_pos == len(start) - 1 and col_pos == len(start[0]) - 1:
-            return [self.move_left(), self.move_up()]
-        if row_pos == 0:
-            return [self.move_right(), self.move_left(), self.move_down()]
-        if row_pos == len(start) - 1:
-            return [self.move_right(), self.move_left(), self.move_up()]
-        if col_pos == 0:
-            return [self.move_right(), self.move_down(), self.move_up()]
-        if col_pos == len(start[0]) - 1:
-            return [self.move_left(), self.move_down(), self.move_up()]
+        return list(self.iter_extensions())
+
+    def iter_extensions(self):
+        """
+        Yield the configurations one step away from the current configuration,
+        building each one only when it is asked for: moving "*" right, left,
+        up, then down, wherever the grid allows.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: iterator[MNPuzzle]
+
+        >>> start = (("*", "2", "3"), ("1", "4", "5"))
+        >>> finish = (("1", "2", "3"), ("4", "5", "*"))
+        >>> moves = MNPuzzle(start, finish).iter_extensions()
+        >>> next(moves) == MNPuzzle((("2", "*", "3"), ("1", "4", "5")), finish)
+        True
+        """
+        if self._blank is not None:
+            for target in _neighbours(self.n, self.m)[self._blank]:
+                yield self._child(target)
+
+    def heuristic(self):
+        """
+        Return the sum of the Manhattan distances of the symbols of MNPuzzle
+        self from their places in to_grid, plus two moves for each symbol
+        that has to leave its goal row or column to let others past (linear
+        conflicts). This never overestimates the number of moves left. With
+        a pattern database, return its value instead when that is larger.
+
+        Once asked for, the estimate is carried to each extension and
+        updated from the move alone.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: int
+
+        >>> start = (("*", "2", "3"), ("1", "4", "5"))
+        >>> finish = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(start, finish).heuristic()
+        3
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")), finish).heuristic()
+        4
+        """
+        if self._goal is None:
+            self._goal = _goal_positions(self._target, self.m)
+        if self._goal is not None:
+            if self._estimate is None:
+                self._estimate = self._full_estimate()
+            total = self._estimate[0]
         else:
-            return [self.move_right(), self.move_left(), self.move_up(), self.move_down()]
+            total = self._repeated_symbol_estimate()
+        if self._pattern_database is not None:
+            total = max(total, self._pattern_database.value(self._cells))
+        return total
+
+    def _full_estimate(self):
+        """
+        Return the (estimate, manhattan, row conflicts, column conflicts)
+        of MNPuzzle self, computed from scratch.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: tuple
+        """
+        goal, manhattan = self._goal, 0
+        for i in range(len(self._cells)):
+            if self._cells[i] in goal:
+                r, c = divmod(i, self.m)
+                gr, gc = goal[self._cells[i]]
+                manhattan += abs(r - gr) + abs(c - gc)
+        rows = [self._row_conflicts(r) for r in range(self.n)]
+        columns = [self._column_conflicts(c) for c in range(self.m)]
+        return (manhattan + 2 * (sum(rows) + sum(columns)), manhattan,
+                rows, columns)
+
+    def _repeated_symbol_estimate(self):
+        """
+        Return the sum over the symbols of MNPuzzle self of the distance to
+        the nearest place in to_grid holding the same symbol, used when
+        to_grid repeats symbols.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: int
+        """
+        targets = {}
+        for i in range(len(self._target)):
+            targets.setdefault(self._target[i], []).append(divmod(i, self.m))
+        total = 0
+        for i in range(len(self._cells)):
+            symbol = self._cells[i]
+            if symbol != "*" and symbol in targets:
+                r, c = divmod(i, self.m)
+                total += min([abs(r - tr) + abs(c - tc)
+                              for (tr, tc) in targets[symbol]])
+        return total
+
+    def fail_fast(self):
+        """
+        Return True iff to_grid can never be reached from from_grid.
+
+        That is the case if the grids differ in shape or in their symbols.
+        Otherwise, with distinct symbols, each move is a transposition that
+        also moves "*" one step, so to_grid is reachable exactly when the
+        parity of the permutation from from_grid to to_grid matches the
+        parity of the distance "*" has to travel. Grids one row or column
+        wide can only slide, so their symbols must stay in order. Grids with
+        more than one "*" are never ruled out.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bool
+
+        >>> finish = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle((("*", "2", "3"), ("1", "4", "5")), finish).fail_fast()
+        False
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")), finish).fail_fast()
+        True
+        >>> MNPuzzle((("1", "2", "3"), ("4", "6", "*")), finish).fail_fast()
+        True
+        >>> MNPuzzle((("*", "1"), ("*", "2")),
+        ...          (("1", "*"), ("*", "2"))).fail_fast()
+        False
+        """
+        if self._unsolvable is None:
+            self._unsolvable = self._check_unsolvable()
+        return self._unsolvable
+
+    def _check_unsolvable(self):
+        """
+        Return whether to_grid is unreachable from from_grid, as described
+        in fail_fast.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bool
+        """
+        cells, target = self._cells, self._target
+        if (len(self.to_grid) != self.n or
+                any([len(row) != self.m for row in self.to_grid]) or
+                sorted(cells) != sorted(target)):
+            return True
+        if "*" not in cells:
+            # nothing can move
+            return cells != target
+        if cells.count("*") > 1:
+            # only the first "*" moves, and its reach is not worked out
+            return False
+        if self.n == 1 or self.m == 1:
+            return ([x for x in cells if x != "*"] !=
+                    [x for x in target if x != "*"])
+        if len(set(cells)) != len(cells):
+            # repeated symbols can make up for either parity
+            return False
+        position = dict([(target[i], i) for i in range(len(target))])
+        permutation = [position[x] for x in cells]
+        # a permutation is even iff its size less its cycle count is even
+        seen, cycles = [False] * len(cells), 0
+        for i in range(len(cells)):
+            if not seen[i]:
+                cycles += 1
+                j = i
+                while not seen[j]:
+                    seen[j] = True
+                    j = permutation[j]
+        blank_row, blank_col = divmod(self._blank, self.m)
+        goal_row, goal_col = divmod(target.index("*"), self.m)
+        distance = abs(blank_row - goal_row) + abs(blank_col - goal_col)
+        return (len(cells) - cycles) % 2 != distance % 2
+
+    def reversed_puzzle(self):
+        """
+        Return the MNPuzzle that works from to_grid back to from_grid.
+        Every move can be undone, so self can be searched from both ends.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: MNPuzzle
+
+        >>> start = (("*", "2", "3"), ("1", "4", "5"))
+        >>> finish = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(start, finish).reversed_puzzle() == MNPuzzle(finish, start)
+        True
+        """
+        return MNPuzzle(self.to_grid, self.from_grid)
 
     #helper functions
     def move_left(self):
@@ -134,33 +638,7 @@ class MNPuzzle(Puzzle):
         >>> p1.move_left() == MNPuzzle((("*", "2", "3"), ("1", "4", "5")), finish)
         True
         """
-        
-        start = self.from_grid
-        end = self.to_grid
-        grid_list = []
-        #create list of str of all elements in grid
-        for row in start:
-            for x in row:
-                grid_list.append(x)
-        #remember position of * by row pos and col pos
-        row_pos = grid_list.index("*")
-        #swap * with symbol to its left
-        grid_list[row_pos] = grid_list[row_pos - 1]
-        grid_list[row_pos - 1] = "*"
-        #create new list to put in all new tuples of rows
-        final = []
-        #but first create tuples of appropriate length; start with index 0 and
-        i = 0
-        while i < len(grid_list):
-            #and fill each tuple with appropriate number of elements (row length)
-            a = tuple(grid_list[i:i + len(start[0])])
-            #add each tuple (i.e. row) to the final list as it is created
-            final.append(a)
-            #increment i by row length and create tuple for next row
-            i += len(start[0])
-        #return the tuple version of the final list of all the rows in grid
-        return MNPuzzle(tuple(final), end)
-            
+        return self._child(self._blank - 1)
 
     def move_right(self):
         """
@@ -174,24 +652,7 @@ class MNPuzzle(Puzzle):
         True
 
         """
-        start = self.from_grid
-        end = self.to_grid
-        grid_list = []
-        for row in start:
-            for x in row:
-                grid_list.append(x)
-        row_pos = grid_list.index("*")
-        #swap * with symbol to its right
-        grid_list[row_pos] = grid_list[row_pos + 1]
-        grid_list[row_pos + 1] = "*"
-        final = []
-        i = 0
-        while i < len(grid_list):
-            a = tuple(grid_list[i:i + len(start[0])])
-            final.append(a)
-            i += len(start[0])
-        return MNPuzzle(tuple(final), end)
-    
+        return self._child(self._blank + 1)
 
     def move_up(self):
         """
@@ -204,24 +665,7 @@ class MNPuzzle(Puzzle):
         >>> p1.move_up() == MNPuzzle((("2", "*", "3"), ("1", "4", "5")), finish)
         True
         """
-        start = self.from_grid
-        end = self.to_grid
-        grid_list = []
-        for row in start:
-            for x in row:
-                grid_list.append(x)
-        row_pos = grid_list.index("*")
-        #swap * with symbol that would be above * in grid configuration
-        #i.e. swap * with the symbol len(start[0]) places before *
-        grid_list[row_pos] = grid_list[row_pos - len(start[0])]
-        grid_list[row_pos - len(start[0])] = "*"
-        final = []
-        i = 0
-        while i < len(grid_list):
-            a = tuple(grid_list[i:i + len(start[0])])
-            final.append(a)
-            i += len(start[0])
-        return MNPuzzle(tuple(final), end)
+        return self._child(self._blank - self.m)
 
     def move_down(self):
         """
@@ -234,28 +678,8 @@ class MNPuzzle(Puzzle):
         >>> p1.move_down() == MNPuzzle((("2", "4", "3"), ("1", "*", "5")), finish)
         True
         """
-        start = self.from_grid
-        end = self.to_grid
-        grid_list = []
-        for row in start:
-            for x in row:
-                grid_list.append(x)
-        row_pos = grid_list.index("*")
-        #swap * with symbol that would be below * in grid configuration
-        #i.e. swap * with the symbol len(start[0]) places after *
-        grid_list[row_pos] = grid_list[row_pos + len(start[0])]
-        grid_list[row_pos + len(start[0])] = "*"
-        final = []
-        i = 0
-        while i < len(grid_list):
-            a = tuple(grid_list[i:i + len(start[0])])
-            final.append(a)
-            i += len(start[0])
-        return MNPuzzle(tuple(final), end)
+        return self._child(self._blank + self.m)
 
-
-        
-           
     # TODO
     # override is_solved
     # a configuration is solved when from_grid is the same as to_grid
@@ -277,22 +701,10 @@ class MNPuzzle(Puzzle):
         True
         
         """
-        return self.from_grid == self.to_grid
+        return self._cells == self._target
 
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
-    target_grid = (("1", "2", "3"), ("4", "5", "*"))
-    start_grid = (("*", "2", "3"), ("1", "4", "5"))
-    from puzzle_tools import breadth_first_solve, depth_first_solve
-    from time import time
-    start = time()
-    solution = breadth_first_solve(MNPuzzle(start_grid, target_grid))
-    end = time()
-    print("BFS solved: \n\n{} \n\nin {} seconds".format(
-        solution, end - start))
-    start = time()
-    solution = depth_first_solve((MNPuzzle(start_grid, target_grid)))
-    end = time()
-    print("DFS solved: \n\n{} \n\nin {} seconds".format(
-        solution, end - start))
+    from benchmark import main
+    main(["--puzzle", "mn", "--repeat", "1", "--warmup", "0"])
@@ -0,0 +1,281 @@
+"""
+Depth-first search spread over a pool of worker processes
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+from time import time
+from puzzle_tools import depth_first_solve, _path_from_list
+from search_stats import SearchStats
+
+# set in each worker process by _init_worker, shared with the parent
+_stop = None
+# state keys this worker process has seen, over all the tasks it has run
+_visited = set()
+# how many nodes a worker searches between looks at _stop
+_CHECK_EVERY = 256
+# fewest unexplored configurations worth handing back as new tasks
+_MIN_SPLIT = 4
+
+
+def parallel_depth_first_solve(puzzle, workers=None, split_depth=2,
+                               node_budget=20000, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent. Return None if this is not possible.
+
+    The root is expanded breadth-first to split_depth, and the subtree
+    under each resulting configuration is searched depth-first by a pool
+    of worker processes. A worker that searches node_budget nodes without
+    finishing hands its unexplored frontier back to be split into new
+    tasks, which keeps idle workers busy, unless that frontier is too
+    small to be worth splitting. Each worker remembers the states it has
+    seen over all its tasks, so it searches below each state at most once.
+    Once any worker finds a solution the others are told to stop and
+    pending tasks are cancelled, so the path returned is a solution but
+    not necessarily the one depth_first_solve would find.
+
+    Configurations are pickled to reach the workers. If stats is a
+    SearchStats, the nodes generated by all the workers and the wall time
+    are added to it.
+
+    @type puzzle: Puzzle
+    @type workers: int | None
+    @type split_depth: int
+    @type node_budget: int
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "*", "*", "*", "*", "*", "C", "*"]
+    >>> grid += ["*", "*", "*", "*", "*", "D", "*", "B"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> node = parallel_depth_first_solve(s, workers=2)
+    >>> while node.children:
+    ...     node = node.children[0]
+    >>> node.puzzle.is_solved()
+    True
+    >>> node = parallel_depth_first_solve(s, workers=2, split_depth=0,
+    ...                                   node_budget=1)
+    >>> while node.children:
+    ...     node = node.children[0]
+    >>> node.puzzle.is_solved()
+    True
+
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> g = GridPegSolitairePuzzle([list("****"), list("*.**"),
+    ...                             list("****"), list("****")],
+    ...                            {"*", ".", "#"})
+    >>> serial, parallel = SearchStats(), SearchStats()
+    >>> depth_first_solve(g, serial) is None
+    True
+    >>> parallel_depth_first_solve(g, workers=2, node_budget=100,
+    ...                            stats=parallel) is None
+    True
+    >>> parallel.nodes_generated <= 2 * serial.nodes_generated
+    True
+    """
+    if stats is None:
+        stats = SearchStats()
+    start = time()
+    try:
+        return _parallel_search(puzzle, workers, split_depth, node_budget,
+                                stats)
+    finally:
+        stats.seconds += time() - start
+
+
+def _parallel_search(puzzle, workers, split_depth, node_budget, stats):
+    """
+    Return the result of parallel_depth_first_solve on puzzle, counting
+    the nodes generated into stats.
+
+    @type puzzle: Puzzle
+    @type workers: int | None
+    @type split_depth: int
+    @type node_budget: int
+    @type stats: SearchStats
+    @rtype: PuzzleNode | None
+    """
+    if puzzle.fail_fast():
+        return None
+    if puzzle.is_solved():
+        return _path_from_list([puzzle])
+    prefixes, solution = _split(puzzle, split_depth)
+    if solution is not None:
+        return _path_from_list(solution)
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=_init_worker, initargs=(stop,))
+    try:
+        pending = set([pool.submit(_search_subtree, prefix, node_budget)
+                       for prefix in prefixes])
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome, result, nodes = future.result()
+                stats.nodes_generated += nodes
+                if outcome == "solved":
+                    stop.set()
+                    for other in pending:
+                        other.cancel()
+                    return _path_from_list(result)
+                elif outcome == "split":
+                    pending |= set([pool.submit(_search_subtree, prefix,
+                                                node_budget)
+                                    for prefix in result])
+        return None
+    finally:
+        pool.shutdown(wait=True)
+
+
+def speedup_report(puzzle, workers=None, split_depth=2, node_budget=20000):
+    """
+    Return a dict comparing the wall time of depth_first_solve and
+    parallel_depth_first_solve on puzzle, with keys "workers",
+    "serial_seconds", "parallel_seconds", "speedup" and "solved".
+
+    @type puzzle: Puzzle
+    @type workers: int | None
+    @type split_depth: int
+    @type node_budget: int
+    @rtype: dict
+    """
+    start = time()
+    serial = depth_first_solve(puzzle)
+    serial_seconds = time() - start
+    start = time()
+    parallel = parallel_depth_first_solve(puzzle, workers, split_depth,
+                                          node_budget)
+    parallel_seconds = time() - start
+    return {"workers": workers or multiprocessing.cpu_count(),
+            "serial_seconds": serial_seconds,
+            "parallel_seconds": parallel_seconds,
+            "speedup": (serial_seconds / parallel_seconds
+                        if parallel_seconds else 0.0),
+            "solved": (serial is not None, parallel is not None)}
+
+
+def _split(puzzle, depth):
+    """
+    Return a (prefixes, solution) pair from expanding puzzle breadth-first
+    for depth levels: the paths to the configurations left to search, and
+    a path to a solution met on the way, if any.
+
+    @type puzzle: Puzzle
+    @type depth: int
+    @rtype: (list[list[Puzzle]], list[Puzzle] | None)
+    """
+    seen = {puzzle.state_key()}
+    layer = [[puzzle]]
+    for _ in range(depth):
+        next_layer = []
+        for prefix in layer:
+            for ext in prefix[-1].iter_extensions():
+                key = ext.state_key()
+                if key not in seen:
+                    seen.add(key)
+                    if ext.is_solved():
+                        return [], prefix + [ext]
+                    if not ext.fail_fast():
+                        next_layer.append(prefix + [ext])
+        if not next_layer:
+            return next_layer, None
+        layer = next_layer
+    return layer, None
+
+
+def _init_worker(stop):
+    """
+    Remember the Event stop that tells this worker process to give up,
+    and start with no states seen.
+
+    @type stop: multiprocessing.Event
+    @rtype: None
+    """
+    global _stop, _visited
+    _stop, _visited = stop, set()
+
+
+def _search_subtree(prefix, node_budget):
+    """
+    Search depth-first below the last configuration of prefix, which may
+    itself be a solution, skipping states this worker has already seen:
+    those were searched below by an earlier task, or handed back as part
+    of its frontier.
+
+    Return ("solved", path, nodes) with the full path to a solution,
+    ("split", prefixes, nodes) with paths covering the unexplored frontier
+    once node_budget nodes have been searched, or ("done", None, nodes) if
+    the subtree holds no solution, was seen before, or the search was
+    told to stop. nodes is the number of extensions generated.
+
+    @type prefix: list[Puzzle]
+    @type node_budget: int
+    @rtype: (str, list | None, int)
+    """
+    if prefix[-1].is_solved():
+        return "solved", prefix, 0
+    visited = _visited
+    if prefix[-1].state_key() in visited:
+        return "done", None, 0
+    visited.update([p.state_key() for p in prefix])
+    # frames hold the path to a configuration and its extension iterator
+    frames = [(prefix, prefix[-1].iter_extensions())]
+    nodes, budget = 0, node_budget
+    while frames:
+        path, children = frames[-1]
+        ext = next(children, None)
+        if ext is None:
+            frames.pop()
+            continue
+        nodes += 1
+        key = ext.state_key()
+        if key in visited:
+            continue
+        visited.add(key)
+        if nodes % _CHECK_EVERY == 0 and _stop is not None and _stop.is_set():
+            return "done", None, nodes
+        if ext.fail_fast():
+            continue
+        if ext.is_solved():
+            return "solved", path + [ext], nodes
+        frames.append((path + [ext], ext.iter_extensions()))
+        if nodes >= budget:
+            frontier = []
+            for (p, it) in frames:
+                rests = []
+                for rest in it:
+                    if rest.state_key() in visited:
+                        continue
+                    if rest.is_solved():
+                        return "solved", p + [rest], nodes
+                    if not rest.fail_fast():
+                        rests.append(rest)
+                frontier.append((p, rests))
+            if sum([len(rests) for (p, rests) in frontier]) >= _MIN_SPLIT:
+                return "split", [p + [rest] for (p, rests) in frontier
+                                 for rest in rests], nodes
+            # too little left to hand back: keep searching it here
+            frames = [(p, iter(rests)) for (p, rests) in frontier]
+            budget += node_budget
+    return "done", None, nodes
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    from sudoku_puzzle import SudokuPuzzle
+    s = SudokuPuzzle(9,
+                     ["*", "*", "*", "9", "*", "2", "*", "*", "*",
+                      "*", "9", "1", "*", "*", "*", "6", "3", "*",
+                      "*", "3", "*", "*", "7", "*", "*", "8", "*",
+                      "3", "*", "*", "*", "*", "*", "*", "*", "8",
+                      "*", "*", "9", "*", "*", "*", "2", "*", "*",
+                      "5", "*", "*", "*", "*", "*", "*", "*", "7",
+                      "*", "7", "*", "*", "8", "*", "*", "4", "*",
+                      "*", "4", "5", "*", "*", "*", "8", "1", "*",
+                      "*", "*", "*", "3", "*", "6", "*", "*", "*"],
+                     {"1", "2", "3", "4", "5", "6", "7", "8", "9"})
+    print(speedup_report(s))
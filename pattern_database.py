@@ -0,0 +1,210 @@
+"""
+Disjoint additive pattern databases for MNPuzzle heuristics
+
+A pattern database for a group of symbols stores, for every placement of
+those symbols on the grid, the least number of moves of those symbols
+needed to bring them to their places in to_grid. Moves of other symbols
+are free, so the values of disjoint groups can be added and still never
+overestimate the moves left.
+
+Each group's table is one byte per placement, built by a backwards
+breadth-first search from to_grid, written to a cache directory and read
+back through mmap. Solver processes on the same machine share one copy
+of each table through the page cache. Tables are cached per board size,
+goal layout and group, so a database for a new grouping builds only the
+tables it does not already have.
+"""
+from collections import deque
+import hashlib
+import mmap
+import os
+from mn_puzzle import _neighbours
+
+# directory used when no cache_dir is given
+DEFAULT_CACHE_DIR = os.environ.get(
+    "PATTERN_DATABASE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "mn_pattern_databases"))
+# table entry for placements that cannot be reached
+_UNREACHED = 255
+
+
+class PatternDatabase:
+    """
+    Disjoint additive pattern databases for MNPuzzles working towards one
+    to_grid.
+    """
+
+    def __init__(self, to_grid, groups=None, group_size=4, cache_dir=None):
+        """
+        Create a new PatternDatabase self for to_grid, with a table for each
+        group of symbols in groups. By default the symbols are taken in
+        to_grid order, group_size at a time. Missing tables are built and
+        stored in cache_dir.
+
+        @type self: PatternDatabase
+        @type to_grid: tuple[tuple[str]]
+        @type groups: list[tuple[str]] | None
+        @type group_size: int
+        @type cache_dir: str | None
+        @rtype: None
+        """
+        self.to_grid = to_grid
+        self.n, self.m = len(to_grid), len(to_grid[0])
+        target = [x for row in to_grid for x in row]
+        symbols = [x for x in target if x != "*"]
+        if target.count("*") != 1 or len(set(symbols)) != len(symbols):
+            raise ValueError("to_grid needs one \"*\" and distinct symbols")
+        if groups is None:
+            groups = [tuple(symbols[i:i + group_size])
+                      for i in range(0, len(symbols), group_size)]
+        grouped = [x for group in groups for x in group]
+        if len(set(grouped)) != len(grouped) or not set(grouped) <= set(
+                symbols):
+            raise ValueError("groups must be disjoint symbols of to_grid")
+        self.groups = [tuple(group) for group in groups]
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self._target = tuple(target)
+        self._tables = [self._load(group) for group in self.groups]
+
+    def __getstate__(self):
+        """
+        Return what is needed to rebuild PatternDatabase self in another
+        process, which maps the cached tables again instead of copying them.
+
+        @type self: PatternDatabase
+        @rtype: tuple
+        """
+        return self.to_grid, self.groups, self.cache_dir
+
+    def __setstate__(self, state):
+        """
+        Rebuild PatternDatabase self from state.
+
+        @type self: PatternDatabase
+        @type state: tuple
+        @rtype: None
+        """
+        to_grid, groups, cache_dir = state
+        self.__init__(to_grid, groups, cache_dir=cache_dir)
+
+    def value(self, cells):
+        """
+        Return the sum over the groups of PatternDatabase self of the moves
+        needed to bring that group's symbols from their positions in cells,
+        a flattened grid, to their positions in to_grid.
+
+        @type self: PatternDatabase
+        @type cells: tuple[str]
+        @rtype: int
+
+        >>> import tempfile
+        >>> goal = (("1", "2", "3"), ("4", "5", "*"))
+        >>> pdb = PatternDatabase(goal, [("1", "4"), ("2", "3", "5")],
+        ...                       cache_dir=tempfile.mkdtemp())
+        >>> pdb.value(("1", "2", "3", "4", "5", "*"))
+        0
+        >>> pdb.value(("2", "1", "3", "4", "5", "*")) >= 2
+        True
+        """
+        where = dict([(cells[i], i) for i in range(len(cells))])
+        size, total = len(cells), 0
+        for (group, table) in zip(self.groups, self._tables):
+            index, scale = 0, 1
+            for symbol in group:
+                index += where[symbol] * scale
+                scale *= size
+            total += table[index]
+        return total
+
+    def _path(self, group):
+        """
+        Return the cache file name for the table of group.
+
+        @type self: PatternDatabase
+        @type group: tuple[str]
+        @rtype: str
+        """
+        digest = hashlib.sha1(repr((self._target, group)).encode("utf-8"))
+        return os.path.join(self.cache_dir, "pdb-{}x{}-{}.bin".format(
+            self.n, self.m, digest.hexdigest()[:16]))
+
+    def _load(self, group):
+        """
+        Return a read-only memory map of the table for group, building and
+        caching the table first if it is not on disk yet.
+
+        @type self: PatternDatabase
+        @type group: tuple[str]
+        @rtype: mmap.mmap
+        """
+        path = self._path(group)
+        if not os.path.exists(path):
+            table = build_table(self._target, self.n, self.m, group)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write under a temporary name so readers never see half a table
+            partial = "{}.{}.tmp".format(path, os.getpid())
+            with open(partial, "wb") as out:
+                out.write(table)
+            os.replace(partial, path)
+        with open(path, "rb") as stored:
+            return mmap.mmap(stored.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def build_table(target, n, m, group):
+    """
+    Return the pattern database table of group for the flattened n x m
+    grid target.
+
+    Entry p[0] + p[1] * n * m + p[2] * (n * m) ** 2 + ... holds the least
+    number of moves of group's symbols that brings them from positions p
+    to their positions in target. It is found by a breadth-first search
+    backwards from target over (positions, "*" position) states, in which
+    moving "*" onto a group symbol costs 1 and any other move is free.
+
+    @type target: tuple[str]
+    @type n: int
+    @type m: int
+    @type group: tuple[str]
+    @rtype: bytearray
+
+    >>> goal = ("1", "2", "3", "4", "5", "*")
+    >>> table = build_table(goal, 2, 3, ("1",))
+    >>> list(table)
+    [0, 1, 2, 1, 2, 3]
+    """
+    size, neighbours = n * m, _neighbours(n, m)
+    k = len(group)
+    scales = [size ** i for i in range(k)]
+    start = sum([target.index(group[i]) * scales[i] for i in range(k)])
+    # states are index * size + position of "*", each visited once
+    distance = bytearray([_UNREACHED]) * (size ** k * size)
+    table = bytearray([_UNREACHED]) * (size ** k)
+    first = start * size + target.index("*")
+    distance[first] = 0
+    frontier = deque([first])
+    while frontier:
+        state = frontier.popleft()
+        index, blank = divmod(state, size)
+        cost = distance[state]
+        if cost < table[index]:
+            table[index] = cost
+        positions = [(index // scales[i]) % size for i in range(k)]
+        for to in neighbours[blank]:
+            if to in positions:
+                # a group symbol slides from to into the blank
+                i = positions.index(to)
+                moved = (index + (blank - to) * scales[i]) * size + to
+                if cost + 1 < distance[moved]:
+                    distance[moved] = cost + 1
+                    frontier.append(moved)
+            else:
+                moved = index * size + to
+                if cost < distance[moved]:
+                    distance[moved] = cost
+                    frontier.appendleft(moved)
+    return table
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
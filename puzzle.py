@@ -4,6 +4,61 @@ class Puzzle:
     or even unsolvable.
     """
 
+    def __hash__(self):
+        """
+        Return a hash of Puzzle self consistent with its state key.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return a compact, hashable key for the configuration of Puzzle self.
+
+        All the puzzles explored by one search share a goal, so the key only
+        needs to capture what extensions change: two equal puzzles with the
+        same goal have equal state keys, and two puzzles with the same goal
+        and equal state keys are interchangeable for search, though they
+        need not be equal.
+
+        Override this in a subclass with something cheaper than the
+        default, which is str(self).
+
+        @type self: Puzzle
+        @rtype: object
+        """
+        return str(self)
+
+    def heuristic(self):
+        """
+        Return an estimate of the number of extensions still needed to
+        get from Puzzle self to a solution.
+
+        Informed solvers order their search by this estimate. Override this
+        in a subclass where a better estimate is known; it must never
+        overestimate for astar_solve to return a shortest path.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return 0
+
+    def reversed_puzzle(self):
+        """
+        Return a Puzzle that starts from the configuration Puzzle self is
+        working towards and works towards the current configuration of
+        self, or None if self cannot be searched backwards.
+
+        Override this in a subclass whose extensions are reversible, so
+        that bidirectional_solve can search from both ends.
+
+        @type self: Puzzle
+        @rtype: Puzzle | None
+        """
+        return None
+
     def fail_fast(self):
         """
         Return True iff Puzzle self can never be extended to a solution.
@@ -16,6 +71,31 @@ class Puzzle:
         """
         return False
 
+    def propagate(self):
+        """
+        Return the configuration reached from Puzzle self by making every
+        move that is forced on any solution, or None if doing so shows
+        that self cannot be extended to a solution.
+
+        Override this in a subclass where some moves can be deduced
+        without search; by default nothing is forced and self is returned.
+
+        @type self: Puzzle
+        @rtype: Puzzle | None
+        """
+        return self
+
+    def propagates(self):
+        """
+        Return whether the extensions of Puzzle self are already passed
+        through propagate(), in which case solvers pass self through it
+        before searching as well. By default they are not.
+
+        @type self: Puzzle
+        @rtype: bool
+        """
+        return False
+
     def is_solved(self):
         """
         Return True iff Puzzle self is solved.
@@ -39,3 +119,16 @@ class Puzzle:
         @rtype: list[Puzzle]
         """
         raise NotImplementedError
+
+    def iter_extensions(self):
+        """
+        Return an iterator over the legal extensions of Puzzle self.
+
+        Solvers consume extensions through this method. Override it in a
+        subclass with a generator that builds each extension only when it
+        is asked for; the default iterates over extensions().
+
+        @type self: Puzzle
+        @rtype: iterator[Puzzle]
+        """
+        return iter(self.extensions())
@@ -4,80 +4,245 @@ Some functions for working with puzzles
 from puzzle import Puzzle
 from word_ladder_puzzle import WordLadderPuzzle
 from collections import deque
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# uncomment the next two lines on a unix platform, say CDF
-# import resource
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-import sys
-sys.setrecursionlimit(10**6)
-
-
-# TODO
-# implement depth_first_solve
-# do NOT change the type contract
-# you are welcome to create any helper functions
-# you like
-def depth_first_solve(puzzle):
+from heapq import heappush, heappop
+from itertools import count
+from time import perf_counter
+from search_stats import SearchStats, probes
+from stack import Stack
+
+
+def depth_first_solve(puzzle, stats=None, propagate=False):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent. Return None if this is not possible.
 
+    The search is driven by an explicit Stack of frames, each holding a
+    (puzzle, parent) record and the lazy iterator over that puzzle's
+    extensions, rather than by recursion. Its use of the Python stack does
+    not grow with the depth of the search, and each extension is only
+    built when the search is ready to look at it.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search. If propagate is True, puzzle and every extension are passed
+    through their propagate() methods first; see propagating.
+
     @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type propagate: bool
     @rtype: PuzzleNode
+
+    >>> a = WordLadderPuzzle("cat", "cot", {"cat", "cot", "cog"})
+    >>> print(depth_first_solve(a))
+    WordLadderPuzzle(cat -> cot)
+    <BLANKLINE>
+    WordLadderPuzzle(cot -> cot)
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> b = WordLadderPuzzle("cat", "dog", {"cat", "dog"})
+    >>> stats = SearchStats()
+    >>> depth_first_solve(b, stats) is None
+    True
+    >>> stats.nodes_expanded, stats.nodes_generated
+    (1, 0)
     """
-    # return none if unsolvable puzzle
-    if puzzle.fail_fast():
+    return _measured(_depth_first_search, puzzle, stats,
+                     propagate=propagate)
+
+
+def _depth_first_search(puzzle, stats, checks):
+    """
+    Return the result of depth_first_solve on puzzle, counting into stats
+    and calling the puzzle's methods through checks.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @rtype: PuzzleNode | None
+    """
+    fail_fast, is_solved, extensions = checks
+    notify = stats.emit if stats.callback is not None else None
+    if fail_fast(puzzle):
+        stats.fail_fast_prunes += 1
         return None
+    root = (puzzle, None)
+    if is_solved(puzzle):
+        return _solution(root, stats, notify)
+    visited = {puzzle.state_key()}
+    frontier = Stack()
+    frontier.add((root, extensions(puzzle)))
+    # size is the number of frames on the stack, which is one more than
+    # the depth of the configuration on top
+    size = 1
+    stats.nodes_expanded += 1
+    stats.max_frontier = max(stats.max_frontier, size)
+    if notify:
+        notify("expand", puzzle)
+    while not frontier.is_empty():
+        record, children = frontier.remove()
+        size -= 1
+        for ext in children:
+            stats.nodes_generated += 1
+            key = ext.state_key()
+            if key in visited:
+                stats.duplicates_pruned += 1
+                continue
+            visited.add(key)
+            if fail_fast(ext):
+                stats.fail_fast_prunes += 1
+                continue
+            child = (ext, record)
+            stats.max_depth = max(stats.max_depth, size + 1)
+            if is_solved(ext):
+                return _solution(child, stats, notify)
+            # resume this frame once the child's subtree is exhausted
+            frontier.add((record, children))
+            frontier.add((child, extensions(ext)))
+            size += 2
+            stats.nodes_expanded += 1
+            stats.max_frontier = max(stats.max_frontier, size)
+            if notify:
+                notify("expand", ext)
+            break
+    return None
 
-    visited = set()
-    nodes = []
-    level = 0
 
-    depth_first_search(puzzle, visited, nodes, level)
+def _measured(search, puzzle, stats, *args, propagate=False):
+    """
+    Return search(puzzle, stats, checks, *args), adding the time it takes
+    to stats.
 
-    print("done searching")
-    # solution_node should be last node visited
-    #solution_node = nodes[-1]
-    #return get_path(solution_node)
-    return nodes
+    checks are the fail_fast, is_solved and iter_extensions functions from
+    search_stats.probes, with the propagating stage added if propagate is
+    True. If stats is None the puzzle's methods are called untimed and the
+    counters go to a SearchStats nobody will read.
 
+    If propagate is True or puzzle.propagates(), puzzle is passed through
+    its propagate() method before the search, which then starts from the
+    result: a path found is given PuzzleNode(puzzle) as a new root, and
+    None is returned at once if propagate() shows puzzle cannot be solved.
 
-def depth_first_search(start, visited, nodes, level, parent=None):
+    @type search: function
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type propagate: bool
+    @rtype: PuzzleNode | None
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "B", "*", "*", "*", "*", "A", "*"]
+    >>> grid += ["*", "A", "*", "*", "*", "*", "*", "*"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"}, "first", True)
+    >>> node = depth_first_solve(s)
+    >>> node.puzzle is s, node.children[0].puzzle == s.propagate()
+    (True, True)
+    """
+    checks = probes(stats)
+    if stats is None:
+        stats = SearchStats()
+    if propagate:
+        checks = propagating(checks, stats)
+    start = perf_counter()
+    try:
+        first = puzzle
+        if propagate or puzzle.propagates():
+            first = puzzle.propagate()
+            if first is None:
+                stats.fail_fast_prunes += 1
+                return None
+        node = search(first, stats, checks, *args)
+        if node is None or first is puzzle:
+            return node
+        root = PuzzleNode(puzzle, [node])
+        node.parent = root
+        return root
+    finally:
+        stats.seconds += perf_counter() - start
+
+
+def propagating(checks, stats):
     """
-    Search for a PuzzleNode containing the solution to the configuration in
-    PuzzleNode start.
+    Return the (fail_fast, is_solved, iter_extensions) functions checks
+    with a propagation stage added to iter_extensions: each extension is
+    replaced by what its propagate() method returns, and extensions that
+    propagate() shows cannot be solved are dropped and counted in stats as
+    failing fast.
+
+    A solver using these checks makes every forced move after each of its
+    own decisions, so a child in the path it returns may differ from its
+    parent in more than one move.
+
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @type stats: SearchStats
+    @rtype: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["*", "*", "D", "*", "*", "*", "*", "B"]
+    >>> grid += ["*", "A", "*", "*", "C", "*", "*", "*"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> s.propagate().is_solved()
+    False
+    >>> extensions = propagating(probes(None), SearchStats())[2]
+    >>> [x.is_solved() for x in extensions(s)]
+    [True, True]
+    """
+    fail_fast, is_solved, iter_extensions = checks
 
-    @type start: Puzzle
-    @type visited: set{str}
-    @type nodes: list[PuzzleNode]
-    @type parent: PuzzleNode | None
-    @rtype: None
+    def propagated(puzzle):
+        for ext in iter_extensions(puzzle):
+            ext = ext.propagate()
+            if ext is None:
+                stats.fail_fast_prunes += 1
+            else:
+                yield ext
+
+    return fail_fast, is_solved, propagated
+
+
+def _solution(record, stats, notify):
+    """
+    Return the PuzzleNode path for record, the last record of a solution,
+    after reporting it through notify.
+
+    @type record: (Puzzle, tuple | None)
+    @type stats: SearchStats
+    @type notify: (str, Puzzle) -> None | None
+    @rtype: PuzzleNode
     """
+    if notify:
+        notify("solution", record[0])
+    return _build_path(record)
 
-    print("recursing", len(visited), len(nodes), start, level)
 
-    # if leaf node, return to last branching point to continue search
-    if not start:
-        return None
-    elif str(start) in visited:
-        return None
-    else:
-        visited.add(str(start))
-        if start.is_solved():
-            return PuzzleNode(start)
-        else:
-            possible_extensions = start.extensions()
-            for ext in possible_extensions:
-                result = depth_first_search(ext, visited, nodes, level+1, start)
-                if result is not None:
-                    new_node = PuzzleNode(result, parent=start)
-                    nodes.append(new_node)
-                    return new_node
-                else:
-                    print("not solvable", start, level)
-                    return None
+def _build_path(record):
+    """
+    Return the first PuzzleNode of a doubly-linked path of PuzzleNodes built
+    from record, a (puzzle, parent_record) chain ending at the root.
+
+    @type record: (Puzzle, tuple | None)
+    @rtype: PuzzleNode
+    """
+    puzzles = []
+    while record is not None:
+        puzzles.append(record[0])
+        record = record[1]
+    puzzles.reverse()
+    return _path_from_list(puzzles)
+
+
+def _path_from_list(puzzles):
+    """
+    Return the first PuzzleNode of a doubly-linked path of PuzzleNodes
+    holding the puzzles in puzzles, in order.
+
+    @type puzzles: list[Puzzle]
+    @rtype: PuzzleNode
+    """
+    root = node = PuzzleNode(puzzles[0])
+    for puzzle in puzzles[1:]:
+        child = PuzzleNode(puzzle, parent=node)
+        node.children.append(child)
+        node = child
+    return root
 
 
 def get_node(puzzle, parent=None):
@@ -126,50 +291,480 @@ def get_path(solution_node):
 
 
 
-# TODO
-# implement breadth_first_solve
-# do NOT change the type contract
-# you are welcome to create any helper functions
-# you like
-# Hint: you may find a queue useful, that's why
-# we imported deque
-def breadth_first_solve(puzzle):
+def breadth_first_solve(puzzle, stats=None, propagate=False):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
+    The frontier holds (puzzle, parent) records, states are checked
+    against a set of state keys, and each extension is tested for a
+    solution as soon as it is generated.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search. If propagate is True, puzzle and every extension are passed
+    through their propagate() methods first; see propagating.
+
     @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type propagate: bool
     @rtype: PuzzleNode
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> start = (("*", "2", "3"), ("1", "4", "5"))
+    >>> target = (("1", "2", "3"), ("4", "5", "*"))
+    >>> stats = SearchStats()
+    >>> node, steps = breadth_first_solve(MNPuzzle(start, target), stats), 0
+    >>> while node.children:
+    ...     node, steps = node.children[0], steps + 1
+    >>> node.puzzle.is_solved(), steps, stats.max_depth
+    (True, 3, 3)
     """
+    return _measured(_breadth_first_search, puzzle, stats,
+                     propagate=propagate)
 
-    q = deque()
-    start = PuzzleNode(puzzle)
 
-    q.append(start)
-    tried_ext = []
-    while q:
-        node = q.popleft()
-        # this returns error code 'Puzzle" object has no attribute 'puzzle' :(
-        children = node.puzzle.extensions()
-        for ext in children:
-            if ext not in tried_ext:
-                puzzle_node = PuzzleNode(ext)
-                puzzle_node.parent = node
-                node.children.append(puzzle_node)
-                if not ext.is_solved():
-                    q.append(ext)
-                    tried_ext.append(ext)
+def _breadth_first_search(puzzle, stats, checks):
+    """
+    Return the result of breadth_first_solve on puzzle, counting into
+    stats and calling the puzzle's methods through checks.
+
+    Records carry their depth as a third item.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @rtype: PuzzleNode | None
+    """
+    fail_fast, is_solved, extensions = checks
+    notify = stats.emit if stats.callback is not None else None
+    if fail_fast(puzzle):
+        stats.fail_fast_prunes += 1
+        return None
+    root = (puzzle, None, 0)
+    if is_solved(puzzle):
+        return _solution(root, stats, notify)
+    seen = {puzzle.state_key()}
+    frontier = deque([root])
+    while frontier:
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+        record = frontier.popleft()
+        stats.nodes_expanded += 1
+        if notify:
+            notify("expand", record[0])
+        for ext in extensions(record[0]):
+            stats.nodes_generated += 1
+            key = ext.state_key()
+            if key in seen:
+                stats.duplicates_pruned += 1
+                continue
+            seen.add(key)
+            child = (ext, record, record[2] + 1)
+            stats.max_depth = max(stats.max_depth, child[2])
+            if is_solved(ext):
+                return _solution(child, stats, notify)
+            if fail_fast(ext):
+                stats.fail_fast_prunes += 1
+            else:
+                frontier.append(child)
+    return None
+
+
+def bidirectional_solve(puzzle, stats=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    Breadth-first search from both puzzle and puzzle.reversed_puzzle(),
+    always expanding a full layer of the smaller frontier, until the two
+    searches meet on a common state key. Each frontier only grows to about
+    the square root of the size of a one-sided search. Puzzles that cannot
+    be reversed are handed to breadth_first_solve.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode
+
+    >>> ws = {"cat", "cot", "cog", "dot"}
+    >>> node = bidirectional_solve(WordLadderPuzzle("cat", "dot", ws))
+    >>> while node.children:
+    ...     print(node.puzzle)
+    ...     node = node.children[0]
+    WordLadderPuzzle(cat -> dot)
+    WordLadderPuzzle(cot -> dot)
+    >>> print(node.puzzle)
+    WordLadderPuzzle(dot -> dot)
+    """
+    goal = puzzle.reversed_puzzle()
+    if goal is None:
+        return breadth_first_solve(puzzle, stats)
+    return _measured(_bidirectional_search, puzzle, stats, goal)
+
+
+def _bidirectional_search(puzzle, stats, checks, goal):
+    """
+    Return the result of bidirectional_solve on puzzle, whose reversed
+    puzzle is goal, counting into stats and calling the puzzle's methods
+    through checks.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @type goal: Puzzle
+    @rtype: PuzzleNode | None
+    """
+    fail_fast, is_solved = checks[:2]
+    notify = stats.emit if stats.callback is not None else None
+    if fail_fast(puzzle):
+        stats.fail_fast_prunes += 1
+        return None
+    if is_solved(puzzle):
+        return _solution((puzzle, None), stats, notify)
+    # each side maps state keys to ((puzzle, parent), depth)
+    forward = {puzzle.state_key(): ((puzzle, None), 0)}
+    backward = {goal.state_key(): ((goal, None), 0)}
+    meeting = set(forward) & set(backward)
+    forward_layer, backward_layer = [(puzzle, None)], [(goal, None)]
+    while not meeting and forward_layer and backward_layer:
+        stats.max_frontier = max(stats.max_frontier,
+                                 len(forward_layer) + len(backward_layer))
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = _expand_layer(forward_layer, forward,
+                                                   backward, stats, checks)
+        else:
+            backward_layer, meeting = _expand_layer(backward_layer,
+                                                    backward, forward,
+                                                    stats, checks)
+    if not meeting:
+        return None
+    key = min(meeting, key=lambda k: forward[k][1] + backward[k][1])
+    stats.max_depth = forward[key][1] + backward[key][1]
+    path = _join_paths(forward[key][0], backward[key][0])
+    if path is not None and notify:
+        leaf = path
+        while leaf.children:
+            leaf = leaf.children[0]
+        notify("solution", leaf.puzzle)
+    return path
+
+
+def _expand_layer(layer, seen, other, stats, checks):
+    """
+    Return the next layer of records after layer, recording new states in
+    seen, together with the set of new state keys also present in other.
+
+    @type layer: list[(Puzzle, tuple | None)]
+    @type seen: dict[object, ((Puzzle, tuple | None), int)]
+    @type other: dict[object, ((Puzzle, tuple | None), int)]
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @rtype: (list[(Puzzle, tuple | None)], set[object])
+    """
+    fail_fast, extensions = checks[0], checks[2]
+    notify = stats.emit if stats.callback is not None else None
+    next_layer, meeting = [], set()
+    for record in layer:
+        depth = seen[record[0].state_key()][1] + 1
+        stats.nodes_expanded += 1
+        if notify:
+            notify("expand", record[0])
+        for ext in extensions(record[0]):
+            stats.nodes_generated += 1
+            key = ext.state_key()
+            if key in seen:
+                stats.duplicates_pruned += 1
+                continue
+            child = (ext, record)
+            seen[key] = (child, depth)
+            if key in other:
+                meeting.add(key)
+            elif fail_fast(ext):
+                stats.fail_fast_prunes += 1
+            else:
+                next_layer.append(child)
+    return next_layer, meeting
+
+
+def _join_paths(forward_record, backward_record):
+    """
+    Return a PuzzleNode path that follows forward_record from the start to
+    the meeting state, then retraces backward_record to the goal, or None
+    if that does not end in a solution.
+
+    The backward records hold reversed puzzles, so the forward puzzle for
+    each later step is the extension whose state key matches it.
+
+    @type forward_record: (Puzzle, tuple | None)
+    @type backward_record: (Puzzle, tuple | None)
+    @rtype: PuzzleNode | None
+    """
+    puzzles = []
+    while forward_record is not None:
+        puzzles.append(forward_record[0])
+        forward_record = forward_record[1]
+    puzzles.reverse()
+    backward_record = backward_record[1]
+    while backward_record is not None:
+        key = backward_record[0].state_key()
+        step = None
+        for ext in puzzles[-1].iter_extensions():
+            if ext.state_key() == key:
+                step = ext
+                break
+        if step is None:
+            return None
+        puzzles.append(step)
+        backward_record = backward_record[1]
+    if not puzzles[-1].is_solved():
+        return None
+    return _path_from_list(puzzles)
+
+
+def astar_solve(puzzle, stats=None, propagate=False):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    States are expanded in order of path length plus puzzle.heuristic(),
+    so the path is shortest as long as the heuristic never overestimates.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search. If propagate is True, puzzle and every extension are passed
+    through their propagate() methods first; see propagating.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type propagate: bool
+    @rtype: PuzzleNode
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> start = (("*", "2", "3"), ("1", "4", "5"))
+    >>> target = (("1", "2", "3"), ("4", "5", "*"))
+    >>> node, steps = astar_solve(MNPuzzle(start, target)), 0
+    >>> while node.children:
+    ...     node, steps = node.children[0], steps + 1
+    >>> node.puzzle.is_solved(), steps
+    (True, 3)
+    """
+    return _measured(_best_first_search, puzzle, stats, lambda g, h: g + h,
+                     propagate=propagate)
+
+
+def greedy_best_first_solve(puzzle, stats=None, propagate=False):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing an extension
+    of the puzzle in its parent.  Return None if this is not possible.
+
+    States are expanded in order of puzzle.heuristic() alone, which usually
+    finds a solution quickly but not necessarily a shortest one.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search. If propagate is True, puzzle and every extension are passed
+    through their propagate() methods first; see propagating.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type propagate: bool
+    @rtype: PuzzleNode
+
+    >>> a = WordLadderPuzzle("cat", "dot", {"cat", "cot", "dot", "cog"})
+    >>> node = greedy_best_first_solve(a)
+    >>> while node.children:
+    ...     node = node.children[0]
+    >>> print(node.puzzle)
+    WordLadderPuzzle(dot -> dot)
+    """
+    return _measured(_best_first_search, puzzle, stats, lambda g, h: h,
+                     propagate=propagate)
+
+
+def _best_first_search(puzzle, stats, checks, priority):
+    """
+    Return a path from PuzzleNode(puzzle) to a solution found by expanding
+    states from a heap in order of priority(g, h), where g is the number of
+    extensions from puzzle and h is the heuristic estimate of the state.
+    Measurements are counted into stats and the puzzle's methods are called
+    through checks.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @type priority: (int, int) -> int
+    @rtype: PuzzleNode | None
+    """
+    fail_fast, is_solved, extensions = checks
+    notify = stats.emit if stats.callback is not None else None
+    if fail_fast(puzzle):
+        stats.fail_fast_prunes += 1
+        return None
+    # ties are broken on the smaller estimate, then on insertion order,
+    # so records themselves are never compared
+    tie = count()
+    h = puzzle.heuristic()
+    heap = [(priority(0, h), h, next(tie), 0, (puzzle, None))]
+    best_g = {puzzle.state_key(): 0}
+    while heap:
+        stats.max_frontier = max(stats.max_frontier, len(heap))
+        g, record = heappop(heap)[3:]
+        current = record[0]
+        # skip entries superseded by a shorter path to the same state
+        if best_g[current.state_key()] < g:
+            continue
+        if is_solved(current):
+            return _solution(record, stats, notify)
+        stats.nodes_expanded += 1
+        if notify:
+            notify("expand", current)
+        for ext in extensions(current):
+            stats.nodes_generated += 1
+            key = ext.state_key()
+            if key in best_g and best_g[key] <= g + 1:
+                stats.duplicates_pruned += 1
+            else:
+                best_g[key] = g + 1
+                if fail_fast(ext):
+                    stats.fail_fast_prunes += 1
                 else:
-                    final = []
-                    cur_node = ext
-                    while cur_node:
-                        final.append(cur_node)
-                        cur_node = ext.parent
-                    return final.reverse()
+                    stats.max_depth = max(stats.max_depth, g + 1)
+                    h = ext.heuristic()
+                    heappush(heap, (priority(g + 1, h), h, next(tie), g + 1,
+                                    (ext, record)))
     return None
 
 
+def ida_star_solve(puzzle, stats=None, propagate=False):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    Iterative-deepening A*: repeated depth-first searches bounded by path
+    length plus puzzle.heuristic(), raising the bound to the smallest
+    value that exceeded it each time. Only the current path is kept, so
+    memory grows with the depth of the solution rather than with the
+    number of states explored. Extensions that return to a state already
+    on the current path, such as a move undoing the previous one, are
+    pruned.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search, including the number of iterations and the list of thresholds
+    tried. If propagate is True, puzzle and every extension are passed
+    through their propagate() methods first; see propagating.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type propagate: bool
+    @rtype: PuzzleNode
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> start = (("5", "1", "2", "3"), ("*", "6", "7", "4"),
+    ...          ("9", "10", "11", "8"), ("13", "14", "15", "12"))
+    >>> target = (("1", "2", "3", "4"), ("5", "6", "7", "8"),
+    ...           ("9", "10", "11", "12"), ("13", "14", "15", "*"))
+    >>> stats = SearchStats()
+    >>> node, steps = ida_star_solve(MNPuzzle(start, target), stats), 0
+    >>> while node.children:
+    ...     node, steps = node.children[0], steps + 1
+    >>> node.puzzle.is_solved(), steps, stats.iterations
+    (True, 7, 1)
+    """
+    return _measured(_iterative_deepening_search, puzzle, stats,
+                     propagate=propagate)
+
+
+def _iterative_deepening_search(puzzle, stats, checks):
+    """
+    Return the result of ida_star_solve on puzzle, counting into stats and
+    calling the puzzle's methods through checks.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @rtype: PuzzleNode | None
+    """
+    if checks[0](puzzle):
+        stats.fail_fast_prunes += 1
+        return None
+    solution, threshold = None, puzzle.heuristic()
+    while solution is None and threshold is not None:
+        stats.iterations += 1
+        stats.thresholds.append(threshold)
+        solution, threshold = _bounded_search(puzzle, threshold, stats,
+                                              checks)
+    return solution
+
+
+def _bounded_search(puzzle, threshold, stats, checks):
+    """
+    Return a (solution, next_threshold) pair for one depth-first pass of
+    ida_star_solve from puzzle, bounded by threshold.
+
+    solution is a PuzzleNode path or None, and next_threshold is the
+    smallest bound that was exceeded (None if none was).
+
+    @type puzzle: Puzzle
+    @type threshold: int
+    @type stats: SearchStats
+    @type checks: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator)
+    @rtype: (PuzzleNode | None, int | None)
+    """
+    fail_fast, is_solved, extensions = checks
+    notify = stats.emit if stats.callback is not None else None
+    if is_solved(puzzle):
+        if notify:
+            notify("solution", puzzle)
+        return _path_from_list([puzzle]), None
+    next_threshold = None
+    # path[i] owns the extension iterator frames[i]
+    path, keys = [puzzle], [puzzle.state_key()]
+    on_path = set(keys)
+    frames = [extensions(puzzle)]
+    stats.nodes_expanded += 1
+    while frames:
+        ext = next(frames[-1], None)
+        if ext is None:
+            frames.pop()
+            path.pop()
+            on_path.discard(keys.pop())
+            continue
+        stats.nodes_generated += 1
+        key = ext.state_key()
+        if key in on_path:
+            stats.duplicates_pruned += 1
+            continue
+        f = len(path) + ext.heuristic()
+        if f > threshold:
+            if next_threshold is None or f < next_threshold:
+                next_threshold = f
+        elif is_solved(ext):
+            stats.max_depth = max(stats.max_depth, len(path))
+            if notify:
+                notify("solution", ext)
+            return _path_from_list(path + [ext]), None
+        elif fail_fast(ext):
+            stats.fail_fast_prunes += 1
+        else:
+            path.append(ext)
+            keys.append(key)
+            on_path.add(key)
+            frames.append(extensions(ext))
+            stats.nodes_expanded += 1
+            stats.max_depth = max(stats.max_depth, len(path) - 1)
+            stats.max_frontier = max(stats.max_frontier, len(frames))
+            if notify:
+                notify("expand", ext)
+    return None, next_threshold
+
+
 # Class PuzzleNode helps build trees of PuzzleNodes that have
 # an arbitrary number of children, and a parent.
 class PuzzleNode:
@@ -222,5 +817,17 @@ class PuzzleNode:
 
         # doctest not feasible.
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        # build the strings bottom-up with an explicit stack, so that long
+        # solution paths do not run into the recursion limit
+        strings = {}
+        pending = [(self, False)]
+        while pending:
+            node, ready = pending.pop()
+            if ready:
+                strings[id(node)] = "{}\n\n{}".format(
+                    node.puzzle,
+                    "\n".join([strings[id(x)] for x in node.children]))
+            else:
+                pending.append((node, True))
+                pending.extend([(x, False) for x in node.children])
+        return strings[id(self)]
@@ -0,0 +1,165 @@
+"""
+Counters, timers and an event hook for the solvers in puzzle_tools
+"""
+from operator import methodcaller
+from time import perf_counter
+
+
+class SearchStats:
+    """
+    Measurements of one search, filled in by a solver that is handed this
+    SearchStats.
+
+    nodes_generated counts extensions produced, nodes_expanded counts
+    configurations whose extensions were asked for, duplicates_pruned and
+    fail_fast_prunes count extensions dropped for having been seen before
+    or for failing fast. max_frontier and max_depth are the largest number
+    of pending entries and the deepest extension reached. The *_seconds
+    attributes hold the time spent inside the puzzle's own methods, and
+    seconds the time of the whole search. ida_star_solve also records its
+    threshold iterations.
+
+    If callback is given, it is called as callback(event, stats, puzzle)
+    on "expand" and "solution" events; nothing is called otherwise.
+    """
+
+    def __init__(self, callback=None):
+        """
+        Create a new SearchStats self with every measurement at zero.
+
+        @type self: SearchStats
+        @type callback: (str, SearchStats, Puzzle) -> Any | None
+        @rtype: None
+        """
+        self.callback = callback
+        self.nodes_generated = 0
+        self.nodes_expanded = 0
+        self.duplicates_pruned = 0
+        self.fail_fast_prunes = 0
+        self.max_frontier = 0
+        self.max_depth = 0
+        self.extensions_seconds = 0.0
+        self.is_solved_seconds = 0.0
+        self.fail_fast_seconds = 0.0
+        self.seconds = 0.0
+        self.iterations = 0
+        self.thresholds = []
+
+    def __str__(self):
+        """
+        Return a human-readable summary of SearchStats self.
+
+        @type self: SearchStats
+        @rtype: str
+
+        >>> print(SearchStats())
+        0 generated, 0 expanded, 0 duplicates, 0 failed fast, \
+max frontier 0, max depth 0 in 0.000s
+        """
+        return ("{} generated, {} expanded, {} duplicates, {} failed fast, "
+                "max frontier {}, max depth {} in {:.3f}s".format(
+                    self.nodes_generated, self.nodes_expanded,
+                    self.duplicates_pruned, self.fail_fast_prunes,
+                    self.max_frontier, self.max_depth, self.seconds))
+
+    def nodes_per_second(self):
+        """
+        Return the number of extensions generated per second of search.
+
+        @type self: SearchStats
+        @rtype: float
+
+        >>> s = SearchStats()
+        >>> s.nodes_generated, s.seconds = 50, 0.5
+        >>> s.nodes_per_second()
+        100.0
+        """
+        return self.nodes_generated / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        """
+        Return the measurements of SearchStats self as a dict, ready to be
+        exported.
+
+        @type self: SearchStats
+        @rtype: dict
+
+        >>> SearchStats().as_dict()["nodes_expanded"]
+        0
+        """
+        result = dict([(k, v) for (k, v) in vars(self).items()
+                       if k != "callback"])
+        result["thresholds"] = list(self.thresholds)
+        result["nodes_per_second"] = self.nodes_per_second()
+        return result
+
+    def emit(self, event, puzzle):
+        """
+        Pass event about puzzle to the callback of SearchStats self.
+
+        Solvers only call this when a callback was given.
+
+        @type self: SearchStats
+        @type event: str
+        @type puzzle: Puzzle
+        @rtype: None
+        """
+        self.callback(event, self, puzzle)
+
+
+# untimed probes, used when the caller did not ask for measurements
+_UNTIMED = (methodcaller("fail_fast"), methodcaller("is_solved"),
+            methodcaller("iter_extensions"))
+
+
+def probes(stats):
+    """
+    Return the (fail_fast, is_solved, iter_extensions) functions a solver
+    should call on each puzzle: plain method calls if stats is None, or
+    versions that add the time spent to stats.
+
+    @type stats: SearchStats | None
+    @rtype: (Puzzle -> bool, Puzzle -> bool, Puzzle -> iterator[Puzzle])
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> s = SearchStats()
+    >>> fail_fast, is_solved, extensions = probes(s)
+    >>> a = WordLadderPuzzle("cat", "cot", {"cat", "cot"})
+    >>> [str(x) for x in extensions(a)]
+    ['WordLadderPuzzle(cot -> cot)']
+    >>> s.extensions_seconds > 0
+    True
+    """
+    if stats is None:
+        return _UNTIMED
+
+    def fail_fast(puzzle):
+        start = perf_counter()
+        result = puzzle.fail_fast()
+        stats.fail_fast_seconds += perf_counter() - start
+        return result
+
+    def is_solved(puzzle):
+        start = perf_counter()
+        result = puzzle.is_solved()
+        stats.is_solved_seconds += perf_counter() - start
+        return result
+
+    def iter_extensions(puzzle):
+        start = perf_counter()
+        children = puzzle.iter_extensions()
+        stats.extensions_seconds += perf_counter() - start
+        while True:
+            start = perf_counter()
+            ext = next(children, None)
+            stats.extensions_seconds += perf_counter() - start
+            if ext is None:
+                return
+            yield ext
+
+    return fail_fast, is_solved, iter_extensions
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -29,8 +29,8 @@ class Stack(Container):
         >>> s = Stack()
         >>> s.add(8)
         >>> s.add(9)
-        >>> s
-        8, 9
+        >>> print(s)
+        [8, 9]
         """
 
         self._contents.append(obj)
@@ -51,7 +51,7 @@ class Stack(Container):
         7
         """
 
-        self._contents.pop()
+        return self._contents.pop()
 
     def is_empty(self):
         """
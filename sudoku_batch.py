@@ -0,0 +1,210 @@
+"""
+Streaming bulk sudoku solving over a pool of worker processes
+
+Puzzles are read one per line, n * n characters each, with ".", "0" or
+"*" for empty positions, for example:
+
+    python sudoku_batch.py puzzles.txt --workers 4 > solutions.jsonl
+    cat puzzles.txt | python sudoku_batch.py --solver exact_cover
+
+Lines are read only as workers become free, so the input can be larger
+than memory, and each result is written at once as a JSON line holding
+the input line number, the puzzle, its solution (or null), the seconds
+spent and the nodes generated.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import json
+import multiprocessing
+import sys
+from exact_cover import exact_cover_solve
+from puzzle_tools import depth_first_solve
+from search_stats import SearchStats
+from sudoku_puzzle import SudokuPuzzle
+
+# symbols of an n x n sudoku, by default the first n of these
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+# characters standing for an empty position in input lines, unless they
+# are symbols of the sudoku
+EMPTY = ".0*"
+# solvers by name, each taking a SudokuPuzzle and a SearchStats
+SOLVERS = {"depth_first": depth_first_solve,
+           "exact_cover": exact_cover_solve}
+
+
+def parse_line(line, symbols=None):
+    """
+    Return the SudokuPuzzle written on line, with propagation switched on.
+
+    @type line: str
+    @type symbols: str | None
+    @rtype: SudokuPuzzle
+
+    >>> print(parse_line("1..4" "4..." "...." "3..2"))
+    1*|*4
+    4*|**
+    -----
+    **|**
+    3*|*2
+    >>> parse_line("12345")
+    Traceback (most recent call last):
+    ...
+    ValueError: line of length 5 is not a square sudoku
+    """
+    line = line.strip()
+    n = round(len(line) ** (1 / 2))
+    if n * n != len(line) or round(n ** (1 / 2)) ** 2 != n or not n:
+        raise ValueError("line of length {} is not a square sudoku".format(
+            len(line)))
+    symbols = symbols or SYMBOLS[:n]
+    cells = ["*" if ch in EMPTY and ch not in symbols else ch
+             for ch in line]
+    if len(symbols) != n or any([ch not in symbols for ch in cells
+                                 if ch != "*"]):
+        raise ValueError("line uses symbols outside {}".format(symbols))
+    return SudokuPuzzle(n, cells, set(symbols), propagation=True)
+
+
+def solve_line(number, line, solver="depth_first", symbols=None):
+    """
+    Return the JSON-ready result of solving the sudoku on line number of
+    the input with the solver named solver.
+
+    @type number: int
+    @type line: str
+    @type solver: str
+    @type symbols: str | None
+    @rtype: dict
+
+    >>> result = solve_line(1, "1..3" ".3.." "2.3." "...1")
+    >>> result["solution"], result["nodes"]
+    ('1243431221343421', 0)
+    """
+    result = {"line": number, "puzzle": line.strip(), "solution": None}
+    stats = SearchStats()
+    try:
+        node = SOLVERS[solver](parse_line(line, symbols), stats)
+    except ValueError as error:
+        result["error"] = str(error)
+        node = None
+    if node is not None:
+        while node.children:
+            node = node.children[0]
+        result["solution"] = "".join(node.puzzle.state_key())
+    result["seconds"], result["nodes"] = stats.seconds, stats.nodes_generated
+    return result
+
+
+def solve_stream(lines, workers=None, solver="depth_first", symbols=None,
+                 ordered=True):
+    """
+    Yield the result of solve_line for each non-blank line of lines, in
+    input order if ordered is True or as they finish otherwise.
+
+    With workers, the lines are solved in that many processes, with at
+    most a few lines per worker read ahead of the results yielded, counting
+    those finished but held back to keep input order; otherwise they are
+    solved one after another in this process.
+
+    @type lines: iterable[str]
+    @type workers: int | None
+    @type solver: str
+    @type symbols: str | None
+    @type ordered: bool
+    @rtype: iterator[dict]
+
+    >>> lines = ["1..3" ".3.." "2.3." "...1", "", "11.." + "." * 12]
+    >>> [(r["line"], r["solution"]) for r in solve_stream(lines)]
+    [(1, '1243431221343421'), (3, None)]
+    """
+    # (position among the puzzles, line number, line), read lazily
+    numbered = ((i, k, line) for (i, (k, line)) in enumerate(
+        (k + 1, line) for (k, line) in enumerate(lines) if line.strip()))
+    if workers is None:
+        for (i, k, line) in numbered:
+            yield solve_line(k, line, solver, symbols)
+    else:
+        for result in _solve_in_pool(numbered, workers, solver, symbols,
+                                     ordered):
+            yield result
+
+
+def _solve_in_pool(numbered, workers, solver, symbols, ordered):
+    """
+    Yield the result of solve_line for each (position, number, line) of
+    numbered, solved by workers processes, in position order if ordered is
+    True or as they finish otherwise. At most four lines per worker are
+    read ahead of the results yielded, whether they are still being solved
+    or finished and waiting for an earlier line.
+
+    @type numbered: iterator[(int, int, str)]
+    @type workers: int
+    @type solver: str
+    @type symbols: str | None
+    @type ordered: bool
+    @rtype: iterator[dict]
+    """
+    # futures still being solved, and finished results held back by
+    # position; the earliest line not yet yielded is always still pending
+    pending, waiting = {}, {}
+    next_index, numbered = 0, iter(numbered)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            if numbered is not None and (len(pending) + len(waiting) <
+                                         4 * workers):
+                line = next(numbered, None)
+                if line is None:
+                    numbered = None
+                else:
+                    i, k, text = line
+                    pending[pool.submit(solve_line, k, text, solver,
+                                        symbols)] = i
+                continue
+            if not pending:
+                break
+            for future in wait(pending, return_when=FIRST_COMPLETED)[0]:
+                i = pending.pop(future)
+                if not ordered:
+                    yield future.result()
+                    continue
+                waiting[i] = future.result()
+                while next_index in waiting:
+                    yield waiting.pop(next_index)
+                    next_index += 1
+
+
+def main(argv=None):
+    """
+    Solve the sudokus in the file or standard input named by the
+    command-line arguments argv, writing one JSON line per puzzle to
+    standard output, and return the exit status.
+
+    @type argv: list[str] | None
+    @rtype: int
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file of puzzles, one per line (default: stdin)")
+    parser.add_argument("--workers", type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="worker processes, 0 to solve in this process")
+    parser.add_argument("--solver", choices=sorted(SOLVERS),
+                        default="depth_first")
+    parser.add_argument("--symbols", help="symbols of the sudokus, in order")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as they finish")
+    args = parser.parse_args(argv)
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    try:
+        for result in solve_stream(source, args.workers or None, args.solver,
+                                   args.symbols, not args.unordered):
+            sys.stdout.write(json.dumps(result, sort_keys=True) + "\n")
+            sys.stdout.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,108 @@
 from puzzle import Puzzle
 
+# for each n, the (row, column, subsquare) of each position of a flattened
+# n x n grid
+_unit_tables = {}
+
+
+def _units(n):
+    """
+    Return the table of (row, column, subsquare) of each position of a
+    flattened n x n grid, building it the first time it is asked for.
+
+    @type n: int
+    @rtype: tuple[(int, int, int)]
+
+    >>> _units(4)[6]
+    (1, 2, 1)
+    """
+    if n not in _unit_tables:
+        ss = round(n ** (1 / 2))
+        _unit_tables[n] = tuple([(i // n, i % n,
+                                  (i // n) // ss * ss + (i % n) // ss)
+                                 for i in range(n ** 2)])
+    return _unit_tables[n]
+
+
+# for each n, the other positions sharing a row, column or subsquare with
+# each position of a flattened n x n grid
+_peer_tables = {}
+
+
+def _peers(n):
+    """
+    Return the table of positions sharing a row, column or subsquare with
+    each position of a flattened n x n grid, building it the first time it
+    is asked for.
+
+    @type n: int
+    @rtype: tuple[tuple[int]]
+
+    >>> _peers(4)[0]
+    (1, 2, 3, 4, 5, 8, 12)
+    """
+    if n not in _peer_tables:
+        units = _units(n)
+        _peer_tables[n] = tuple([
+            tuple([j for j in range(n ** 2) if j != i and
+                   any([a == b for (a, b) in zip(units[i], units[j])])])
+            for i in range(n ** 2)])
+    return _peer_tables[n]
+
+
+# for each n, the positions in each row, then each column, then each
+# subsquare of a flattened n x n grid
+_member_tables = {}
+
+
+def _members(n):
+    """
+    Return the positions in each row, column and subsquare of a flattened
+    n x n grid, in that order, building them the first time they are asked
+    for.
+
+    @type n: int
+    @rtype: tuple[tuple[int]]
+
+    >>> _members(4)[4], _members(4)[8]
+    ((0, 4, 8, 12), (0, 1, 4, 5))
+    """
+    if n not in _member_tables:
+        units = _units(n)
+        _member_tables[n] = tuple([
+            tuple([i for i in range(n ** 2) if units[i][kind] == unit])
+            for kind in range(3) for unit in range(n)])
+    return _member_tables[n]
+
 
 class SudokuPuzzle(Puzzle):
     """
     A sudoku puzzle that may be solved, unsolved, or even unsolvable.
     """
 
-    def __init__(self, n, symbols, symbol_set):
+    def __init__(self, n, symbols, symbol_set, branching="mrv",
+                 propagation=False):
         """
         Create a new nxn SudokuPuzzle self with symbols
         from symbol_set already selected.
 
+        Extensions fill the empty position chosen by branching: "first"
+        takes the first in reading order, "mrv" one with the fewest legal
+        symbols, preferring on ties the one sharing a row, column or
+        subsquare with the most empty positions. With "mrv" the symbols
+        are tried least constraining first.
+
+        If propagation is True, each extension also fills every position
+        that propagate() finds forced, and extensions that propagate()
+        shows cannot be solved are left out. Solvers then propagate self
+        before searching too.
+
         @type self: SudokuPuzzle
         @type n: int
         @type symbols: list[str]
         @type symbol_set: set[str]
+        @type branching: str
+        @type propagation: bool
         """
         # check n is greater than zero (cannot have negative grid)
         assert n > 0
@@ -26,7 +114,30 @@ class SudokuPuzzle(Puzzle):
         assert len(symbol_set) == n
         # check that there are enough symbols to fill whole grid (n*n)
         assert len(symbols) == n ** 2
+        # check branching is a known strategy
+        assert branching in ("first", "mrv")
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
+        self._branching, self._propagation = branching, propagation
+        # symbols in the order extensions try them, each with its own bit
+        self._order = sorted(symbol_set)
+        self._bits = dict([(self._order[k], 1 << k) for k in range(n)])
+        self._full, self._units = (1 << n) - 1, _units(n)
+        # bitmasks of the symbols used in each row, column and subsquare,
+        # the empty positions in order, and whether no unit repeats a symbol
+        rows, columns, boxes = [0] * n, [0] * n, [0] * n
+        empties, self._valid = [], True
+        for i in range(n ** 2):
+            if symbols[i] == "*":
+                empties.append(i)
+                continue
+            bit = self._bits[symbols[i]]
+            r, c, b = self._units[i]
+            if (rows[r] | columns[c] | boxes[b]) & bit:
+                self._valid = False
+            rows[r], columns[c], boxes[b] = (rows[r] | bit, columns[c] | bit,
+                                             boxes[b] | bit)
+        self._rows, self._columns, self._boxes = rows, columns, boxes
+        self._empties = tuple(empties)
 
     def __eq__(self, other):
         """
@@ -60,6 +171,30 @@ class SudokuPuzzle(Puzzle):
                 self._n == other._n and self._symbols == other._symbols and
                 self._symbol_set == other._symbol_set)
 
+    def __hash__(self):
+        """
+        Return a hash of SudokuPuzzle self consistent with __eq__.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return a hashable key for the current configuration of
+        SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: tuple[str]
+
+        >>> s = SudokuPuzzle(4, ["A", "B", "C", "D"] + ["*"] * 12,
+        ...                  {"A", "B", "C", "D"})
+        >>> s.state_key()[:5]
+        ('A', 'B', 'C', 'D', '*')
+        """
+        return tuple(self._symbols)
+
     def __str__(self):
         """
         Return a human-readable string representation of SudokuPuzzle self.
@@ -135,14 +270,9 @@ class SudokuPuzzle(Puzzle):
         >>> s.is_solved()
         False
         """
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # no "*" left and all rows, column, subsquares have correct symbols
-        return ("*" not in symbols and
-                all([(self._row_set(i) == self._symbol_set and
-                      self._column_set(i) == self._symbol_set and
-                      self._subsquare_set(i) ==
-                      self._symbol_set) for i in range(n ** 2)]))
+        # no "*" left and no row, column or subsquare repeats a symbol, so
+        # each holds every symbol once
+        return self._valid and not self._empties
 
     def extensions(self):
         """
@@ -166,33 +296,229 @@ class SudokuPuzzle(Puzzle):
         >>> all([s in L1 for s in L2])
         True
         """
-        # convenient names
-        symbols, symbol_set, n = self._symbols, self._symbol_set, self._n
-        if "*" not in symbols:
-            # return an empty list
-            return [_ for _ in []]
-        else:
-            # position of first empty position
-            i = symbols.index("*")
-            # allowed symbols at position i
-            # A | B == A.union(B)
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
-            # list of SudokuPuzzles with each legal digit at position i
-            return (
-                [SudokuPuzzle(n,
-                 symbols[:i] + [d] + symbols[i + 1:], symbol_set)
-                 for d in allowed_symbols])
+        return list(self.iter_extensions())
 
+    def iter_extensions(self):
+        """
+        Yield the extensions of SudokuPuzzle self one at a time, copying
+        the symbols for each only when it is asked for.
+
+        @type self: SudokuPuzzle
+        @rtype: iterator[SudokuPuzzle]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> print(next(s.iter_extensions()).state_key()[-1])
+        A
+        """
+        if self._empties:
+            # position to fill, and the symbols still allowed there
+            i = self._branch_position()
+            allowed = self._candidates(i)
+            ks = [k for k in range(self._n) if allowed >> k & 1]
+            if self._branching == "mrv":
+                # least constraining first: the symbol that leaves the
+                # empty positions sharing a unit with i the most choice
+                peers = [self._candidates(j) for j in _peers(self._n)[i]
+                         if self._symbols[j] == "*"]
+                ks.sort(key=lambda k: len([p for p in peers if p >> k & 1]))
+            # a SudokuPuzzle with each legal digit at position i, in a
+            # fixed order so that searches are reproducible
+            for k in ks:
+                child = self._child(i, self._order[k])
+                if self._propagation:
+                    child = child.propagate()
+                    if child is None:
+                        continue
+                yield child
+
+    def _branch_position(self):
+        """
+        Return the empty position of SudokuPuzzle self that extensions
+        fill, according to self's branching strategy.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+
+        >>> grid = ["A", "*", "*", "*", "*", "*", "*", "*"]
+        >>> grid += ["*", "*", "*", "*", "*", "B", "C", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"}, "first")
+        >>> s._branch_position()
+        1
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s._branch_position()
+        12
+        """
+        if self._branching == "first":
+            return self._empties[0]
+        fewest, tied = self._n + 1, []
+        for i in self._empties:
+            count = bin(self._candidates(i)).count("1")
+            if count < fewest:
+                fewest, tied = count, [i]
+                if count <= 1:
+                    # forced or failed: no other choice can be better
+                    return i
+            elif count == fewest:
+                tied.append(i)
+        if len(tied) == 1:
+            return tied[0]
+        symbols, peers = self._symbols, _peers(self._n)
+        # degree: the empty positions a choice at i constrains
+        return max(tied, key=lambda i: len([j for j in peers[i]
+                                            if symbols[j] == "*"]))
+
+    def _child(self, i, d):
+        """
+        Return the SudokuPuzzle with symbol d at empty position i of
+        SudokuPuzzle self, updating the bitmasks of self for that one
+        position instead of recounting the grid.
+
+        @type self: SudokuPuzzle
+        @type i: int
+        @type d: str
+        @rtype: SudokuPuzzle
+        """
+        symbols, bit = self._symbols, self._bits[d]
+        r, c, b = self._units[i]
+        child = object.__new__(type(self))
+        child._n, child._symbol_set = self._n, self._symbol_set
+        child._branching, child._propagation = (self._branching,
+                                                self._propagation)
+        child._symbols = symbols[:i] + [d] + symbols[i + 1:]
+        child._order, child._bits = self._order, self._bits
+        child._full, child._units = self._full, self._units
+        child._valid = self._valid and bool(self._candidates(i) & bit)
+        child._rows, child._columns = list(self._rows), list(self._columns)
+        child._boxes = list(self._boxes)
+        child._rows[r] |= bit
+        child._columns[c] |= bit
+        child._boxes[b] |= bit
+        child._empties = tuple([j for j in self._empties if j != i])
+        return child
+
+    def _candidates(self, i):
+        """
+        Return the bitmask of symbols not yet used in the row, column and
+        subsquare of position i of SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @type i: int
+        @rtype: int
+
+        >>> s = SudokuPuzzle(4, ["A", "B", "C", "*"] + ["*"] * 12,
+        ...                  {"A", "B", "C", "D"})
+        >>> bin(s._candidates(3)), bin(s._candidates(4))
+        ('0b1000', '0b1100')
+        """
+        r, c, b = self._units[i]
+        return self._full & ~(self._rows[r] | self._columns[c] |
+                              self._boxes[b])
+
+    def propagates(self):
+        """
+        Return whether SudokuPuzzle self propagates its extensions.
+
+        @type self: SudokuPuzzle
+        @rtype: bool
+
+        >>> s = SudokuPuzzle(4, ["*"] * 16, {"A", "B", "C", "D"},
+        ...                  propagation=True)
+        >>> s.propagates()
+        True
+        """
+        return self._propagation
+
+    def propagate(self):
+        """
+        Return the SudokuPuzzle reached from SudokuPuzzle self by filling,
+        until none are left, every empty position with only one legal
+        symbol (a naked single) and every symbol with only one legal
+        position left in some row, column or subsquare (a hidden single).
+        Return None if an empty position or a missing symbol of a unit
+        runs out of legal places on the way.
+
+        @type self: SudokuPuzzle
+        @rtype: SudokuPuzzle | None
+
+        >>> grid = ["A", "B", "*", "*", "*", "*", "A", "*"]
+        >>> grid += ["*", "A", "*", "*", "*", "*", "*", "*"]
+        >>> print(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}).propagate())
+        AB|**
+        **|AB
+        -----
+        *A|**
+        **|*A
+        >>> grid = ["A", "*", "*", "C", "*", "C", "*", "*"]
+        >>> grid += ["B", "*", "C", "*", "*", "*", "*", "A"]
+        >>> print(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}).propagate())
+        AB|DC
+        DC|AB
+        -----
+        BA|CD
+        CD|BA
+        >>> grid[14] = "D"
+        >>> SudokuPuzzle(4, grid, {"A", "B", "C", "D"}).propagate() is None
+        True
+        """
+        puzzle, members = self, _members(self._n)
+        while True:
+            if not puzzle._valid:
+                return None
+            candidates, forced = {}, {}
+            for i in puzzle._empties:
+                allowed = candidates[i] = puzzle._candidates(i)
+                if not allowed:
+                    return None
+                if not allowed & (allowed - 1):
+                    forced[i] = allowed
+            if not forced:
+                used = puzzle._rows + puzzle._columns + puzzle._boxes
+                for u in range(len(members)):
+                    # symbols allowed somewhere in unit u, and more than once
+                    once = more = 0
+                    for i in members[u]:
+                        allowed = candidates.get(i, 0)
+                        more |= once & allowed
+                        once |= allowed
+                    if once | used[u] != puzzle._full:
+                        return None
+                    for i in members[u]:
+                        single = candidates.get(i, 0) & once & ~more
+                        if single:
+                            forced[i] = single
+            if not forced:
+                return puzzle
+            for (i, bit) in forced.items():
+                # a position that is a hidden single twice fails next round
+                k = bit.bit_length() - 1
+                puzzle = puzzle._child(i, puzzle._order[k])
+
+    def heuristic(self):
+        """
+        Return the number of empty positions in SudokuPuzzle self, each of
+        which takes exactly one extension to fill.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+
+        >>> s = SudokuPuzzle(4, ["A", "B", "C", "D"] + ["*"] * 12,
+        ...                  {"A", "B", "C", "D"})
+        >>> s.heuristic()
+        12
+        """
+        return len(self._empties)
 
     def fail_fast(self):
         """
         Return True iff Puzzle self contains an empty position where all legal
-        symbols have already been used in its row, column, and subsquare, and
-        therefore self cannot be extended to any solution. Overridden from
-        parent method.
+        symbols have already been used in its row, column, and subsquare, or
+        a row, column or subsquare holding some symbol twice, and therefore
+        self cannot be extended to any solution. Overridden from parent
+        method.
 
         @param self: Puzzle
         @rtype: bool
@@ -204,142 +530,21 @@ class SudokuPuzzle(Puzzle):
         >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
         >>> s.fail_fast()
         True
+        >>> grid = ["A", "*", "A", "*"] + ["*"] * 12
+        >>> SudokuPuzzle(4, grid, {"A", "B", "C", "D"}).fail_fast()
+        True
         """
-        for i in range(0, self._n ** 2):
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
+        if not self._valid:
+            return True
+        for i in self._empties:
             # if i is empty but all legal symbols have already been used
-            if self._symbols[i] == '*' and not allowed_symbols:
+            if not self._candidates(i):
                 return True
         return False
 
-    # some helper methods
-    def _row_set(self, m):
-        #
-        # Return set of symbols in row of SudokuPuzzle self's symbols
-        # where position m occurs.
-        #
-        # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # first position in m's row
-        r = (m // n) * n
-        # set of elements from symbols[r] .. symbols[r+n-1]
-        return set([symbols[r + i] for i in range(n)])
-
-    def _column_set(self, m):
-        # Return set of symbols in column of SudokuPuzzle self's symbols
-        # where position m occurs.
-        #
-        # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m <= self._n ** 2
-        # convenient names
-        symbols, n = self._symbols, self._n
-        # first position in m's column
-        c = m % n
-        # set of elements from symbols[c], symbols[c + n],
-        # ... symbols[c + (n * (n-1))]
-        return set([symbols[c + (i * n)] for i in range(n)])
-
-    def _subsquare_set(self, m):
-        # Return set of symbols in subsquare of SudokuPuzzle self's symbols
-        # where position m occurs.
-        #
-        # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # row, column where m occur
-        row, col = m // n, m % n
-        # length of subsquares
-        ss = round(n ** (1 / 2))
-        # upper-left position of m's subsquare
-        ul = (((row // ss) * ss) * n) + ((col // ss) * ss)
-        # return set of symbols from subsquare starting at ul
-        return set(
-            [symbols[ul + i + n * j] for i in range(ss) for j in range(ss)])
-
 
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
-    s = SudokuPuzzle(9,
-                     ["*", "*", "*", "7", "*", "8", "*", "1", "*",
-                      "*", "*", "7", "*", "9", "*", "*", "*", "6",
-                      "9", "*", "3", "1", "*", "*", "*", "*", "*",
-                      "3", "5", "*", "8", "*", "*", "6", "*", "1",
-                      "*", "*", "*", "*", "*", "*", "*", "*", "*",
-                      "1", "*", "6", "*", "*", "9", "*", "4", "8",
-                      "*", "*", "*", "*", "*", "1", "2", "*", "7",
-                      "8", "*", "*", "*", "7", "*", "4", "*", "*",
-                      "*", "6", "*", "3", "*", "2", "*", "*", "*"],
-                     {"1", "2", "3", "4", "5", "6", "7", "8", "9"})
-
-    from time import time
-
-    print("solving sudoku from July 9 2015 Star... \n\n{}\n\n".format(s))
-    from puzzle_tools import depth_first_solve
-
-    start = time()
-    sol = depth_first_solve(s)
-    print(sol)
-    while sol.children:
-        sol = sol.children[0]
-    end = time()
-    print("time to solve 9x9 using depth_first: "
-          "{} seconds\n".format(end - start))
-    print(sol)
-
-    s = SudokuPuzzle(9,
-                     ["*", "*", "*", "9", "*", "2", "*", "*", "*",
-                      "*", "9", "1", "*", "*", "*", "6", "3", "*",
-                      "*", "3", "*", "*", "7", "*", "*", "8", "*",
-                      "3", "*", "*", "*", "*", "*", "*", "*", "8",
-                      "*", "*", "9", "*", "*", "*", "2", "*", "*",
-                      "5", "*", "*", "*", "*", "*", "*", "*", "7",
-                      "*", "7", "*", "*", "8", "*", "*", "4", "*",
-                      "*", "4", "5", "*", "*", "*", "8", "1", "*",
-                      "*", "*", "*", "3", "*", "6", "*", "*", "*"],
-                     {"1", "2", "3", "4", "5", "6", "7", "8", "9"})
-
-    print("solving 3-star sudoku from \"That's Puzzling\","
-          "November 14th 2015\n\n{}\n\n".format(s))
-    start = time()
-    sol = depth_first_solve(s)
-    while sol.children:
-        sol = sol.children[0]
-    end = time()
-    print("time to solve 9x9 using depth_first: {} seconds\n".format(
-        end - start))
-    print(sol)
-
-    s = SudokuPuzzle(9,
-                     ["5", "6", "*", "*", "*", "7", "*", "*", "9",
-                      "*", "7", "*", "*", "4", "8", "*", "3", "1",
-                      "*", "*", "*", "*", "*", "*", "*", "*", "*",
-                      "4", "3", "*", "*", "*", "*", "*", "*", "*",
-                      "*", "8", "*", "*", "*", "*", "*", "9", "*",
-                      "*", "*", "*", "*", "*", "*", "*", "2", "6",
-                      "*", "*", "*", "*", "*", "*", "*", "*", "*",
-                      "1", "9", "*", "3", "6", "*", "*", "7", "*",
-                      "7", "*", "*", "1", "*", "*", "*", "4", "2"],
-                     {"1", "2", "3", "4", "5", "6", "7", "8", "9"})
-
-    print(
-        "solving 4-star sudoku from \"That's Puzzling\", "
-        "November 14th 2015\n\n{}\n\n".format(
-            s))
-    start = time()
-    sol = depth_first_solve(s)
-    while sol.children:
-        sol = sol.children[0]
-    end = time()
-    print("time to solve 9x9 using depth_first: {} seconds\n".format(
-        end - start))
-    print(sol)
+    from benchmark import main
+    main(["--puzzle", "sudoku", "--repeat", "1", "--warmup", "0"])
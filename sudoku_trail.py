@@ -0,0 +1,299 @@
+"""
+Depth-first SudokuPuzzle search on one board changed in place
+
+Rather than building a new SudokuPuzzle for every extension, trail_solve
+copies the board once and fills and empties its positions in place. Each
+assignment is recorded on a trail, and backtracking pops the trail back to
+where the abandoned choice was made. SudokuPuzzles are only built for the
+path to the solution that is returned.
+"""
+from time import perf_counter
+from puzzle_tools import _path_from_list
+from search_stats import SearchStats
+from sudoku_puzzle import _members, _peers
+
+
+class _Board:
+    """
+    The positions and used-symbol bitmasks of a SudokuPuzzle, changed in
+    place, with the trail of assignments made since it was copied.
+    """
+
+    def __init__(self, puzzle):
+        """
+        Create a new _Board self holding a copy of SudokuPuzzle puzzle.
+
+        @type self: _Board
+        @type puzzle: SudokuPuzzle
+        @rtype: None
+        """
+        self.n, self.full, self.units = puzzle._n, puzzle._full, puzzle._units
+        # "*" at empty positions; filled ones hold a symbol or, once
+        # assigned here, its bit
+        self.symbols = list(puzzle._symbols)
+        # used-symbol bitmasks of rows, columns and subsquares, in turn
+        self.used = (list(puzzle._rows), list(puzzle._columns),
+                     list(puzzle._boxes))
+        # the empty positions, and the index of each in empties
+        self.empties = list(puzzle._empties)
+        self.where = dict([(self.empties[j], j)
+                           for j in range(len(self.empties))])
+        # (position, bit, index in empties) of each assignment, in the order
+        # they were made
+        self.trail = []
+
+    def candidates(self, i):
+        """
+        Return the bitmask of symbols still legal at position i of _Board
+        self.
+
+        @type self: _Board
+        @type i: int
+        @rtype: int
+        """
+        r, c, b = self.units[i]
+        rows, columns, boxes = self.used
+        return self.full & ~(rows[r] | columns[c] | boxes[b])
+
+    def assign(self, i, bit):
+        """
+        Put the symbol of bit at empty position i of _Board self and record
+        it on the trail.
+
+        @type self: _Board
+        @type i: int
+        @type bit: int
+        @rtype: None
+        """
+        r, c, b = self.units[i]
+        rows, columns, boxes = self.used
+        rows[r] |= bit
+        columns[c] |= bit
+        boxes[b] |= bit
+        self.symbols[i] = bit
+        # move the last empty position into i's place
+        j, last = self.where.pop(i), self.empties.pop()
+        if last != i:
+            self.empties[j], self.where[last] = last, j
+        self.trail.append((i, bit, j))
+
+    def undo(self, mark):
+        """
+        Take back the assignments of _Board self after the first mark on
+        its trail, latest first.
+
+        @type self: _Board
+        @type mark: int
+        @rtype: None
+        """
+        rows, columns, boxes = self.used
+        while len(self.trail) > mark:
+            i, bit, j = self.trail.pop()
+            r, c, b = self.units[i]
+            rows[r] ^= bit
+            columns[c] ^= bit
+            boxes[b] ^= bit
+            self.symbols[i] = "*"
+            if j == len(self.empties):
+                self.empties.append(i)
+            else:
+                last = self.empties[j]
+                self.empties.append(last)
+                self.where[last] = len(self.empties) - 1
+                self.empties[j] = i
+            self.where[i] = j
+
+    def dead_end(self):
+        """
+        Return whether some empty position of _Board self has no legal
+        symbol left.
+
+        @type self: _Board
+        @rtype: bool
+        """
+        for i in self.empties:
+            if not self.candidates(i):
+                return True
+        return False
+
+    def propagate(self):
+        """
+        Fill naked and hidden singles of _Board self until none are left,
+        as SudokuPuzzle.propagate does, and return False if some position
+        or missing unit symbol runs out of places on the way.
+
+        @type self: _Board
+        @rtype: bool
+        """
+        members = _members(self.n)
+        while True:
+            candidates, forced = {}, {}
+            for i in self.empties:
+                allowed = candidates[i] = self.candidates(i)
+                if not allowed:
+                    return False
+                if not allowed & (allowed - 1):
+                    forced[i] = allowed
+            if not forced:
+                used = self.used[0] + self.used[1] + self.used[2]
+                for u in range(len(members)):
+                    once = more = 0
+                    for i in members[u]:
+                        allowed = candidates.get(i, 0)
+                        more |= once & allowed
+                        once |= allowed
+                    if once | used[u] != self.full:
+                        return False
+                    for i in members[u]:
+                        single = candidates.get(i, 0) & once & ~more
+                        if single & (single - 1):
+                            # the only place left for several symbols
+                            return False
+                        if single:
+                            forced[i] = single
+            if not forced:
+                return True
+            for (i, bit) in forced.items():
+                if not self.candidates(i) & bit:
+                    return False
+                self.assign(i, bit)
+
+    def branch(self, branching):
+        """
+        Return the empty position of _Board self to branch on and the bits
+        of its legal symbols in the order to try them, last first, chosen
+        as a SudokuPuzzle with branching would. assign and undo reorder
+        empties, so they are looked at in position order as SudokuPuzzle
+        does.
+
+        @type self: _Board
+        @type branching: str
+        @rtype: (int, list[int])
+        """
+        empties = sorted(self.empties)
+        if branching == "first":
+            i = empties[0]
+        else:
+            fewest, tied = self.n + 1, []
+            for j in empties:
+                count = bin(self.candidates(j)).count("1")
+                if count < fewest:
+                    fewest, tied = count, [j]
+                    if count <= 1:
+                        break
+                elif count == fewest:
+                    tied.append(j)
+            peers, symbols = _peers(self.n), self.symbols
+            i = tied[0]
+            if len(tied) > 1:
+                i = max(tied, key=lambda j: len(
+                    [p for p in peers[j] if symbols[p] == "*"]))
+        allowed = self.candidates(i)
+        bits = [1 << k for k in range(self.n) if allowed >> k & 1]
+        if branching != "first":
+            around = [self.candidates(j) for j in _peers(self.n)[i]
+                      if self.symbols[j] == "*"]
+            bits.sort(key=lambda bit: len([a for a in around if a & bit]))
+        bits.reverse()
+        return i, bits
+
+
+def trail_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution of SudokuPuzzle puzzle, each child filling one more empty
+    position. Return None if puzzle has no solution.
+
+    The search branches as puzzle's branching option says and, if its
+    propagation option is set, propagates singles in puzzle before it
+    starts and after each choice. That is what depth_first_solve does on
+    puzzle, so the two find the same solution, but this search changes a
+    single board in place and undoes assignments from a trail when it
+    backtracks.
+
+    If stats is a SearchStats, it is filled in with measurements of the
+    search.
+
+    @type puzzle: SudokuPuzzle
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | None
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "*", "*", "C", "*", "C", "*", "*"]
+    >>> grid += ["B", "*", "C", "*", "*", "*", "*", "A"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> node, steps = trail_solve(s), 0
+    >>> while node.children:
+    ...     node, steps = node.children[0], steps + 1
+    >>> node.puzzle.is_solved(), steps
+    (True, 10)
+    >>> grid[15] = "C"
+    >>> trail_solve(SudokuPuzzle(4, grid, {"A", "B", "C", "D"})) is None
+    True
+    >>> from puzzle_tools import depth_first_solve
+    >>> s = SudokuPuzzle(4, ["A"] + ["*"] * 15, {"A", "B", "C", "D"},
+    ...                  propagation=True)
+    >>> ends = []
+    >>> for node in (trail_solve(s), depth_first_solve(s)):
+    ...     while node.children:
+    ...         node = node.children[0]
+    ...     ends.append(node.puzzle)
+    >>> ends[0] == ends[1]
+    True
+    """
+    if stats is None:
+        stats = SearchStats()
+    start = perf_counter()
+    try:
+        return _trail_search(puzzle, stats)
+    finally:
+        stats.seconds += perf_counter() - start
+
+
+def _trail_search(puzzle, stats):
+    """
+    Return the result of trail_solve on puzzle, counting into stats.
+
+    @type puzzle: SudokuPuzzle
+    @type stats: SearchStats
+    @rtype: PuzzleNode | None
+    """
+    if puzzle.fail_fast():
+        return None
+    board, propagation = _Board(puzzle), puzzle._propagation
+    if propagation and not board.propagate():
+        return None
+    # one (position, bits left to try, trail length) frame per decision
+    frames = []
+    while board.empties:
+        i, bits = board.branch(puzzle._branching)
+        stats.nodes_expanded += 1
+        frames.append((i, bits, len(board.trail)))
+        stats.max_depth = max(stats.max_depth, len(frames))
+        while frames:
+            i, bits, mark = frames[-1]
+            board.undo(mark)
+            if not bits:
+                frames.pop()
+                continue
+            board.assign(i, bits.pop())
+            stats.nodes_generated += 1
+            if propagation:
+                alive = board.propagate()
+            else:
+                alive = not board.dead_end()
+            if alive:
+                break
+            stats.fail_fast_prunes += 1
+        if not frames:
+            return None
+    # snapshots only along the solution
+    path, order = [puzzle], puzzle._order
+    for (i, bit, j) in board.trail:
+        path.append(path[-1]._child(i, order[bit.bit_length() - 1]))
+    return _path_from_list(path)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,188 @@
+"""
+Batch validation and candidate masks for many sudoku grids at once
+
+Grids are encoded as one integer array of shape (batch, n, n), with 0 for
+an empty position and k + 1 for the k-th symbol in sorted order. check
+finds which grids repeat no symbol in a row, column or subsquare and
+which are also full, and candidates computes for every empty position of
+every grid the bitmask of its legal symbols, as SudokuPuzzle does for one.
+
+NumPy is used when it is installed, working on the whole batch at once.
+Without it the same results are computed grid by grid as nested lists,
+so results can be read the same way either way: result[b][r][c].
+"""
+from sudoku_puzzle import _units
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _use_numpy(use_numpy):
+    """
+    Return whether to work with NumPy: use_numpy if given, or whether it
+    is installed. Raise ImportError if use_numpy asks for a missing NumPy.
+
+    @type use_numpy: bool | None
+    @rtype: bool
+    """
+    if use_numpy is None:
+        return numpy is not None
+    if use_numpy and numpy is None:
+        raise ImportError("NumPy is not installed")
+    return use_numpy
+
+
+def encode(grids, n, symbols=None, use_numpy=None):
+    """
+    Return the (batch, n, n) board of codes for each grid of grids, each a
+    sequence of n * n symbols with "*", "." or "0" for empty positions,
+    such as a line of a puzzle file or SudokuPuzzle.state_key(). symbols
+    are the n symbols in use, by default those of the first n of
+    "123456789ABCDEFGHIJKLMNOP".
+
+    @type grids: iterable[sequence[str]]
+    @type n: int
+    @type symbols: str | list[str] | None
+    @type use_numpy: bool | None
+    @rtype: numpy.ndarray | list[list[list[int]]]
+
+    >>> boards = encode(["1..4" "4..." "...." "3..2"], 4, use_numpy=False)
+    >>> boards[0][0]
+    [1, 0, 0, 4]
+    """
+    order = sorted(symbols or "123456789ABCDEFGHIJKLMNOP"[:n])
+    table = dict([(order[k], k + 1) for k in range(n)])
+    for empty in "*.0":
+        table.setdefault(empty, 0)
+    codes = [[table[x] for x in grid] for grid in grids]
+    if _use_numpy(use_numpy):
+        return numpy.asarray(codes, dtype=numpy.int8).reshape(-1, n, n)
+    return [[grid[r * n:(r + 1) * n] for r in range(n)] for grid in codes]
+
+
+def check(boards, use_numpy=None):
+    """
+    Return a (valid, solved) pair of sequences with an entry per board of
+    boards: whether no row, column or subsquare of the board repeats a
+    symbol, and whether it is also full.
+
+    @type boards: numpy.ndarray | list[list[list[int]]]
+    @type use_numpy: bool | None
+    @rtype: (sequence[bool], sequence[bool])
+
+    >>> grids = ["1234" "3412" "2143" "4321", "1234" "3412" "2143" "4312",
+    ...          "1..4" "4..." "...." "3..2"]
+    >>> valid, solved = check(encode(grids, 4))
+    >>> [bool(v) for v in valid], [bool(s) for s in solved]
+    ([True, False, True], [True, False, False])
+    """
+    if _use_numpy(use_numpy):
+        return _numpy_check(numpy.asarray(boards))
+    valid, solved = [], []
+    for board in boards:
+        n = len(board)
+        cells = [x for row in board for x in row]
+        used, ok = [0] * (3 * n), True
+        for (i, (r, c, b)) in enumerate(_units(n)):
+            if cells[i]:
+                bit = 1 << (cells[i] - 1)
+                for u in (r, n + c, 2 * n + b):
+                    ok = ok and not used[u] & bit
+                    used[u] |= bit
+        valid.append(ok)
+        solved.append(ok and 0 not in cells)
+    return valid, solved
+
+
+def candidates(boards, use_numpy=None):
+    """
+    Return the bitmask of legal symbols of each position of each board of
+    boards, shaped like boards: bit k is set if the symbol coded k + 1 is
+    used in none of the position's row, column and subsquare. Filled
+    positions have no candidates.
+
+    @type boards: numpy.ndarray | list[list[list[int]]]
+    @type use_numpy: bool | None
+    @rtype: numpy.ndarray | list[list[list[int]]]
+
+    >>> masks = candidates(encode(["1..4" "4..." "...." "3..2"], 4))
+    >>> [int(m) for m in masks[0][0]], [int(m) for m in masks[0][3]]
+    ([0, 6, 6, 0], [0, 9, 9, 0])
+    """
+    if _use_numpy(use_numpy):
+        return _numpy_candidates(numpy.asarray(boards))
+    result = []
+    for board in boards:
+        n = len(board)
+        cells = [x for row in board for x in row]
+        units, used = _units(n), [0] * (3 * n)
+        for (i, (r, c, b)) in enumerate(units):
+            if cells[i]:
+                bit = 1 << (cells[i] - 1)
+                used[r] |= bit
+                used[n + c] |= bit
+                used[2 * n + b] |= bit
+        full = (1 << n) - 1
+        masks = [0 if cells[i] else
+                 full & ~(used[r] | used[n + c] | used[2 * n + b])
+                 for (i, (r, c, b)) in enumerate(units)]
+        result.append([masks[r * n:(r + 1) * n] for r in range(n)])
+    return result
+
+
+def _counts(boards):
+    """
+    Return how often each symbol occurs in each row, column and subsquare
+    of each board of the (batch, n, n) array boards, as arrays of shape
+    (batch, n, n) indexed by row, column or subsquare and then symbol.
+
+    @type boards: numpy.ndarray
+    @rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    n = boards.shape[-1]
+    ss = round(n ** (1 / 2))
+    # onehot[b, r, c, k] is whether board b holds symbol k + 1 at (r, c)
+    onehot = boards[..., None] == numpy.arange(1, n + 1)
+    rows, columns = onehot.sum(axis=2), onehot.sum(axis=1)
+    boxes = onehot.reshape(-1, ss, ss, ss, ss, n).sum(axis=(2, 4))
+    return rows, columns, boxes.reshape(-1, n, n)
+
+
+def _numpy_check(boards):
+    """
+    Return check(boards) for the (batch, n, n) array boards, for the whole
+    batch at once.
+
+    @type boards: numpy.ndarray
+    @rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    rows, columns, boxes = _counts(boards)
+    valid = ((rows <= 1).all(axis=(1, 2)) & (columns <= 1).all(axis=(1, 2)) &
+             (boxes <= 1).all(axis=(1, 2)))
+    return valid, valid & (boards != 0).all(axis=(1, 2))
+
+
+def _numpy_candidates(boards):
+    """
+    Return candidates(boards) for the (batch, n, n) array boards, for the
+    whole batch at once.
+
+    @type boards: numpy.ndarray
+    @rtype: numpy.ndarray
+    """
+    n = boards.shape[-1]
+    ss = round(n ** (1 / 2))
+    weights = numpy.left_shift(1, numpy.arange(n, dtype=numpy.int64))
+    rows, columns, boxes = [(counts > 0).dot(weights)
+                            for counts in _counts(boards)]
+    # spread each subsquare's mask over its ss x ss positions
+    boxes = boxes.reshape(-1, ss, ss).repeat(ss, axis=1).repeat(ss, axis=2)
+    used = rows[:, :, None] | columns[:, None, :] | boxes
+    return numpy.where(boards == 0, ((1 << n) - 1) & ~used, 0)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
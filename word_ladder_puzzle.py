@@ -46,6 +46,29 @@ class WordLadderPuzzle(Puzzle):
                self._word_set == other._word_set and \
                self._chars == other._chars
 
+    def __hash__(self):
+        """
+        Return a hash of WordLadderPuzzle self consistent with __eq__.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return a hashable key for the current configuration of
+        WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: str
+
+        >>> a = WordLadderPuzzle("safe", "same", {"safe", "same", "save"})
+        >>> a.state_key()
+        'safe'
+        """
+        return self._from_word
+
     def __str__(self):
         """
         Return a user-friendly string interpretation of WordLadderPuzzle
@@ -98,23 +121,66 @@ class WordLadderPuzzle(Puzzle):
         >>> all([s in L2 for s in L1])
         True
         """
+        return list(self.iter_extensions())
+
+    def iter_extensions(self):
+        """
+        Yield the extensions of WordLadderPuzzle self one at a time.
+
+        @type self: WordLadderPuzzle
+        @rtype: iterator[WordLadderPuzzle]
+
+        >>> word_set = {"cat", "cot", "cab"}
+        >>> a = WordLadderPuzzle("cat", "cot", word_set)
+        >>> sorted([str(x) for x in a.iter_extensions()])
+        ['WordLadderPuzzle(cab -> cot)', 'WordLadderPuzzle(cot -> cot)']
+        """
         # convenient names
         start, end, ws, chars = self._from_word, self._to_word, \
                                 self._word_set, self._chars
-        # if puzzle is complete, return an empty list
-        if start == end:
-            return []
-        else:
-            list_ = []
+        # if puzzle is complete, there are no extensions
+        if start != end:
             # change each letter of start to form a new word
-            for i in range(len(start) - 1):
+            for i in range(len(start)):
                 for char in chars:
                     new_start = start[:i] + char + start[i + 1:]
                     # if new word is a legal word (and not the same as start)
                     if new_start in ws and new_start != start:
-                        # add new word as extension of puzzle config
-                        list_.append(WordLadderPuzzle(new_start, end, ws))
-            return list_
+                        # yield new word as extension of puzzle config
+                        yield WordLadderPuzzle(new_start, end, ws)
+
+    def heuristic(self):
+        """
+        Return the number of letters of WordLadderPuzzle self's current word
+        that differ from its target word. Each step changes one letter, so
+        this never overestimates.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+
+        >>> a = WordLadderPuzzle("safe", "same", {"safe", "same", "rave"})
+        >>> a.heuristic()
+        1
+        """
+        start, end = self._from_word, self._to_word
+        return (len([i for i in range(min(len(start), len(end)))
+                     if start[i] != end[i]]) +
+                abs(len(start) - len(end)))
+
+    def reversed_puzzle(self):
+        """
+        Return the WordLadderPuzzle that steps from the target word of
+        WordLadderPuzzle self back to its current word.
+
+        @type self: WordLadderPuzzle
+        @rtype: WordLadderPuzzle
+
+        >>> a = WordLadderPuzzle("safe", "same", {"safe", "same", "rave"})
+        >>> print(a.reversed_puzzle())
+        WordLadderPuzzle(same -> safe)
+        """
+        return WordLadderPuzzle(self._to_word, self._from_word,
+                                self._word_set)
 
     def is_solved(self):
         """
@@ -136,24 +202,8 @@ class WordLadderPuzzle(Puzzle):
                (self._from_word and self._from_word) in self._word_set
 
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     import doctest
     doctest.testmod()
-
-    from puzzle_tools import breadth_first_solve, depth_first_solve
-    from time import time
-    with open("words", "r") as words:
-        word_set = set(words.read().split())
-    w = WordLadderPuzzle("same", "cost", word_set)
-    start = time()
-    sol = breadth_first_solve(w)
-    end = time()
-    print("Solving word ladder from same->cost")
-    print("...using breadth-first-search")
-    print("Solutions: {} took {} seconds.".format(sol, end - start))
-    start = time()
-    sol = depth_first_solve(w)
-    end = time()
-    print("Solving word ladder from same->cost")
-    print("...using depth-first-search")
-    print("Solutions: {} took {} seconds.".format(sol, end - start))
+    from benchmark import main
+    main(["--puzzle", "word_ladder", "--repeat", "1", "--warmup", "0"])